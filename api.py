@@ -0,0 +1,98 @@
+# api.py
+# Read-only JSON API on the Flask server, for pages that embed traces without the Dash UI.
+#
+#   GET /api/trace/<algorithm>?array=5,3,8,1&pivot=last
+#
+# returns serialize_trace() of the run plus the options it used. The other
+# query parameters are the algorithm's options (see the registry); missing
+# ones take their defaults. A trace depends only on its inputs, so the strong
+# ETag is derived from them (not from the body) and If-None-Match is answered
+# with 304 before any trace is built.
+#
+# Anyone can call this, so the work per request is bounded: arrays stay below
+# the trace store's threshold (nothing is written to disk), and a trace that
+# would run past TRACE_API_MAX_STEPS is refused rather than built in full.
+#
+#   TRACE_API_MAX_ELEMENTS=500    longest array accepted
+#   TRACE_API_MAX_STEPS=1000000   longest trace built for a request
+#   TRACE_API_MAX_AGE=86400       Cache-Control max-age in seconds
+import hashlib
+import json
+import logging
+import os
+from flask import Response, request
+from sorting_algorithms.registry import get_algorithm
+
+TRACE_API_MAX_ELEMENTS = int(os.environ.get("TRACE_API_MAX_ELEMENTS", 500))
+TRACE_API_MAX_STEPS = int(os.environ.get("TRACE_API_MAX_STEPS", 1_000_000))
+TRACE_API_MAX_AGE = int(os.environ.get("TRACE_API_MAX_AGE", 86400))
+
+logger = logging.getLogger(__name__)
+
+
+def _error(status, message):
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+def trace_etag(key):
+    """Strong validator for the trace cached under `key`, as built by this deployment."""
+    from sorting_algorithms.trace import TRACE_FORMAT_VERSION
+    from sorting_algorithms.trace_cache import TRACE_MAX_STEPS
+    # The format version and step limit change the body for the same inputs
+    return hashlib.blake2b(f"{key}|{TRACE_FORMAT_VERSION}|{TRACE_MAX_STEPS}".encode(), digest_size=16).hexdigest()
+
+
+def _cacheable(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={TRACE_API_MAX_AGE}"
+    return response
+
+
+def register_trace_api(app):
+    """Serve traces of the registered algorithms at /api/trace/<algorithm>."""
+
+    @app.server.route("/api/trace/<name>")
+    def serve_trace(name):
+        from sorting_algorithms.array_input import parse_values, text_chunks, validate_values  # Needs numpy
+        from sorting_algorithms.trace import Trace, serialize_trace
+        from sorting_algorithms.trace_cache import trace_cache, trace_key
+
+        algorithm = get_algorithm(name)
+        if algorithm is None:
+            return _error(404, f"Unknown algorithm '{name}'.")
+
+        if "array" not in request.args:
+            return _error(400, "Missing 'array' parameter.")
+        try:
+            arr = validate_values(parse_values(text_chunks(request.args["array"]), TRACE_API_MAX_ELEMENTS), TRACE_API_MAX_ELEMENTS)
+        except ValueError as e:
+            return _error(400, str(e))
+
+        # Options are strict here: a typo should not silently return the default run
+        unknown = sorted(set(request.args) - {"array"} - set(algorithm.options))
+        if unknown:
+            return _error(400, f"Unknown parameter '{unknown[0]}'.")
+        options = algorithm.default_options()
+        for option, choices in algorithm.options.items():
+            value = request.args.get(option, options[option])
+            if value not in choices:
+                return _error(400, f"Invalid {option} '{value}': expected one of {', '.join(choices)}.")
+            options[option] = value
+
+        key = trace_key(name, arr, options)
+        etag = trace_etag(key)
+        if request.if_none_match.contains_weak(etag):
+            return _cacheable(Response(status=304), etag)
+
+        # Reuse a trace the pages have built; otherwise build one in memory, up to the API's step
+        # limit. A cut-off trace is never cached, since the pages expect the full one under its key.
+        trace = trace_cache.find(key)
+        if trace is None:
+            trace = Trace.from_steps(name, arr, algorithm.steps(list(arr), **options), max_steps=TRACE_API_MAX_STEPS)
+            if trace.truncated:
+                return _error(400, f"Too many steps: this API builds traces of at most {TRACE_API_MAX_STEPS:,} steps.")
+            trace.keyframes  # Built up front so the cache accounts for them, as get_or_build does
+            trace_cache.put(key, trace)
+        body = json.dumps({**serialize_trace(trace), "options": options})
+        logger.debug("trace api key=%s steps=%d bytes=%d", key, len(trace), len(body))
+        return _cacheable(Response(body, mimetype="application/json"), etag)
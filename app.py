@@ -1,3 +1,6 @@
+import logging
+import os
+import tempfile
 import dash
 from dash import dcc, html
 import dash_bootstrap_components as dbc
@@ -6,15 +9,32 @@ from dash.dependencies import Input, Output, State
 # Import layouts & callbacks
 from pages.home import home_layout
 from pages.input_array import input_array_layout, register_callbacks as register_input_array_callbacks
-from sorting_algorithms.insertion_sort import insertion_sort_layout, register_insertion_callbacks
-from sorting_algorithms.selection_sort import selection_sort_layout, register_selection_sort_callbacks
-from sorting_algorithms.quick_sort import quick_sort_layout, register_quick_sort_callbacks
+from pages.sorting import sorting_layout, register_sorting_callbacks
+from pages.race import race_layout, register_race_callbacks
+from sorting_algorithms.registry import get_algorithm
+from metrics import instrument_callbacks
+from api import register_trace_api
+from profiling import configure_logging, install_profiler
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Long-running callbacks (trace generation for large arrays) run in their own process,
+# with progress and results kept in a disk cache that every worker on the host shares
+CALLBACK_CACHE_DIR = os.environ.get("CALLBACK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sorting-callbacks"))
+
+
+def background_callback_manager():
+    import diskcache
+    return dash.DiskcacheManager(diskcache.Cache(CALLBACK_CACHE_DIR))
+
 
 # Initialize the Dash app
 app = dash.Dash(
     __name__, 
     external_stylesheets=[dbc.themes.BOOTSTRAP], 
-    suppress_callback_exceptions=True
+    suppress_callback_exceptions=True,
+    background_callback_manager=background_callback_manager()
 )
 
 server = app.server
@@ -38,7 +58,7 @@ def store_method(search):
         query_params = dict(param.split('=') for param in search.lstrip('?').split('&') if '=' in param)
         method = query_params.get("method", "")
         if method:
-            print(f"✅ Storing method: {method}")  # Debugging
+            logger.debug("store_method method=%s", method)
             return method  # Store the method
     return dash.no_update  # No unnecessary updates
 
@@ -49,36 +69,40 @@ def store_method(search):
     [State('url', 'search')]
 )
 def display_page(pathname, stored_method, search):
-    print(f"Pathname: {pathname}, Search: {search}, Stored Method: {stored_method}")  # Debugging
+    logger.debug("display_page pathname=%s search=%s stored_method=%s", pathname, search, stored_method)
 
     if pathname in ['/', '/home']:
         return home_layout  # Home page layout
     elif pathname == '/input-array':
         return input_array_layout  # Input array page layout
+    elif pathname == '/race':
+        return race_layout()  # All algorithms on the stored array
     elif pathname.startswith('/sorting'):  
         # Extract method from search query or fallback to stored-method
         query_params = dict(param.split('=') for param in search.lstrip('?').split('&') if '=' in param) if search else {}
         method = query_params.get("method", stored_method)
 
-        print(f"Sorting Method: {method}")  # Debugging print
-
-        # Match Sorting Method to the Correct Layout
-        if method == "quick-sort":
-            return quick_sort_layout()  # Call the function to generate the layout
-        elif method == "selection-sort":
-            return selection_sort_layout()  # Call the function to generate the layout
-        elif method == "insertion-sort":
-            return insertion_sort_layout()  # Call the function to generate the layout
-        else:
+        # Look up the registered algorithm (its module is imported on first use)
+        algorithm = get_algorithm(method)
+        if algorithm is None:
             return html.H3("Invalid sorting method", className="text-center mt-5")
+        return (algorithm.layout or sorting_layout)(algorithm)
     
     return html.H3("404 - Page Not Found", className="text-center mt-5")
 
 # Register callbacks for all pages
 register_input_array_callbacks(app)
-register_insertion_callbacks(app)  # Register Insertion Sort callbacks
-register_selection_sort_callbacks(app)
-register_quick_sort_callbacks(app)  # Uncomment if quick_sort_callbacks is defined
+register_sorting_callbacks(app)  # One generic page serves every registered algorithm
+register_race_callbacks(app)
+
+# Callback latency, call counts and payload sizes at /metrics
+instrument_callbacks(app)
+
+# Opt-in cProfile/tracemalloc runs of the callbacks (see profiling.py), listed at /diagnostics
+install_profiler(app)
+
+# Read-only, cacheable trace JSON at /api/trace/<algorithm> (see api.py)
+register_trace_api(app)
 
 # Run the app
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+// input_array.js
+// Input page validation in the browser: every keystroke in the array boxes is
+// checked here, so the server only hears about the array on Submit.
+(function () {
+    var MIN_VALUE = 10;
+    var MAX_VALUE = 99;
+
+    function isValid(value) {
+        return typeof value === "number" && Number.isInteger(value) && value >= MIN_VALUE && value <= MAX_VALUE;
+    }
+
+    // A single digit is a two-digit number still being typed, so it is kept;
+    // anything else out of range (100+, negatives, decimals) is cleared
+    function isPartial(value) {
+        return Number.isInteger(value) && value >= 1 && value < MIN_VALUE;
+    }
+
+    // Pattern-matching ids render as the JSON of the id with its keys sorted
+    function focusBox(index) {
+        var box = document.getElementById(JSON.stringify({index: index, type: "array-input"}));
+        if (box) {
+            box.focus();
+            box.select();
+        }
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        inputArray: {
+            // Outputs: [box values, submit disabled]
+            validate: function (values) {
+                var noUpdate = window.dash_clientside.no_update;
+                values = values || [];
+                var cleaned = values.map(function (value) {
+                    return value === null || value === undefined || isValid(value) || isPartial(value) ? value : null;
+                });
+                var changed = cleaned.some(function (value, i) { return value !== values[i]; });
+
+                // Move on to the next box once the edited one holds a full two-digit value
+                var triggered = window.dash_clientside.callback_context.triggered || [];
+                triggered.forEach(function (t) {
+                    if (t.prop_id.indexOf("{") !== 0) {
+                        return;
+                    }
+                    var index = JSON.parse(t.prop_id.slice(0, t.prop_id.lastIndexOf("."))).index;
+                    if (isValid(cleaned[index]) && index + 1 < values.length) {
+                        setTimeout(function () { focusBox(index + 1); }, 0);
+                    }
+                });
+
+                var complete = values.length > 0 && cleaned.every(isValid);
+                return [changed ? cleaned : noUpdate, !complete];
+            },
+
+            // Bulk upload feedback: the file is only parsed on the server when it is used
+            uploaded: function (filename) {
+                return filename ? "Loaded " + filename + ". Click 'Use These Values' to sort it." : "";
+            }
+        }
+    });
+})();
@@ -0,0 +1,347 @@
+// playback.js
+// Clientside playback engine: the server sends a serialized trace once
+// (see sorting_algorithms/trace.py) and every animation frame is rendered here.
+(function () {
+    var OPNAMES = {1: "compare", 2: "swap", 3: "shift", 4: "pivot", 5: "settle", 6: "lift", 7: "place"};
+
+    // Decode serialize_trace(trace, compress=False): the opcode column followed
+    // by the delta-encoded int32 index columns a, b and c (little-endian).
+    function decodeTrace(payload) {
+        var raw = atob(payload.steps);
+        var bytes = new Uint8Array(raw.length);
+        for (var i = 0; i < raw.length; i++) {
+            bytes[i] = raw.charCodeAt(i);
+        }
+        var length = payload.length;
+        var view = new DataView(bytes.buffer);
+        var columns = [];
+        var offset = length;
+        for (var col = 0; col < 3; col++) {
+            var values = new Int32Array(length);
+            var running = 0;
+            for (var k = 0; k < length; k++) {
+                running += view.getInt32(offset + 4 * k, true);
+                values[k] = running;
+            }
+            columns.push(values);
+            offset += 4 * length;
+        }
+        return {
+            algorithm: payload.algorithm,
+            initial: payload.initial.slice(),
+            length: length,
+            op: bytes.subarray(0, length),
+            a: columns[0],
+            b: columns[1],
+            c: columns[2],
+            counters: payload.counters || {},
+            depth: payload.depth ? withDeepest(payload.depth) : null
+        };
+    }
+
+    // depth.deepest[i]: the deepest level reached by depth.positions[i]
+    function withDeepest(depth) {
+        var deepest = 0;
+        depth.deepest = depth.depths.map(function (level) {
+            deepest = Math.max(deepest, level);
+            return deepest;
+        });
+        return depth;
+    }
+
+    // Running totals for the live counters (client_counters() in pages/sorting.py):
+    // totals[k] is a counter's value over the first k steps, summed once up front
+    function countTotals(trace) {
+        return Object.keys(trace.counters).map(function (label) {
+            var weights = trace.counters[label];
+            var totals = new Float64Array(trace.length + 1);
+            for (var k = 0; k < trace.length; k++) {
+                totals[k + 1] = totals[k] + (weights[trace.op[k]] || 0);
+            }
+            return {label: label, totals: totals};
+        });
+    }
+
+    // Recursion depth at step k, and the deepest level reached by then
+    function depthAt(depth, k) {
+        var lo = 0, hi = depth.positions.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (depth.positions[mid] <= k) { lo = mid + 1; } else { hi = mid; }
+        }
+        if (lo === 0) {
+            return [0, 0];
+        }
+        return [depth.depths[lo - 1], depth.deepest[lo - 1]];
+    }
+
+    function htmlDiv(className, children) {
+        return {type: "Div", namespace: "dash_html_components", props: {className: className, children: children}};
+    }
+
+    // Same markup as counter_panel() on the server
+    function renderCounters(engine, p) {
+        var trace = engine.trace;
+        var items = engine.counters.map(function (counter) {
+            return [counter.label, counter.totals[Math.min(p + 1, trace.length)].toLocaleString("en-US")];
+        });
+        if (trace.depth && trace.length) {
+            var levels = depthAt(trace.depth, Math.min(p, trace.length - 1));
+            items.push(["Recursion depth", levels[0].toLocaleString("en-US") + " (max " + levels[1].toLocaleString("en-US") + ")"]);
+        }
+        return items.map(function (item) {
+            return htmlDiv("counter", [htmlDiv("counter-label", item[0]), htmlDiv("counter-value", item[1])]);
+        });
+    }
+
+    // Per-algorithm highlight rules, mirroring the server-side ones: each returns
+    // the CSS state classes (assets/styles.css) of box idx, "" when plain. The
+    // server only sends traces of algorithms registered with browser_playback.
+    var HIGHLIGHT = {
+        "quick-sort": function (idx, op, a, b) {
+            if (op === "pivot" && idx === a) { return "pivot"; }
+            if (op === "compare" && (idx === a || idx === b)) { return "compare"; }
+            if (op === "swap" && (idx === a || idx === b)) { return "swap"; }
+            if (op === "settle" && idx === a) { return "settled"; }
+            return "";
+        },
+        "insertion-sort": function (idx, op, a, b) {
+            if (idx !== a && idx !== b) { return ""; }
+            if (op === "swap") { return idx === a ? "swap left" : "swap right"; }
+            if (op === "place") { return "settled"; }
+            return op;  // lift, compare, shift
+        },
+        "selection-sort": function (idx, op, a, b, c) {
+            if (op === "compare" && idx === c) { return "min"; }
+            if (op === "compare" && (idx === a || idx === b)) { return "compare"; }
+            if (op === "swap" && (idx === a || idx === b)) { return "swap"; }
+            if (op === "settle" && idx <= a) { return "settled"; }
+            return "";
+        }
+    };
+
+    var DESCRIBE = {
+        "quick-sort": function (s, op, a, b, c) {
+            // Introsort's heap sort steps carry the heap start as c; partition steps have c = -1
+            if (op === "pivot") { return "Selected pivot: " + s[a]; }
+            if (op === "compare" && c >= 0) { return "Heap sort: comparing " + s[a] + " and " + s[b]; }
+            if (op === "compare") { return "Comparing " + s[a] + " with pivot " + s[b]; }
+            if (op === "swap") { return "Swapping " + s[a] + " and " + s[b]; }
+            if (op === "settle" && c >= 0) { return s[a] + " is now in its correct position."; }
+            if (op === "settle") { return "Pivot " + s[a] + " is now in its correct position."; }
+            return "";
+        },
+        "insertion-sort": function (s, op, a, b) {
+            if (op === "lift") { return "Compare " + s[a] + " and " + s[b]; }
+            if (op === "compare") { return "Comparing " + s[a] + " and " + s[b]; }
+            if (op === "swap") { return "Swapping " + s[b] + " and " + s[a]; }
+            if (op === "shift") { return "Shifting " + s[b] + " to the right"; }
+            if (op === "place") { return "Placing " + s[a] + " in its correct position"; }
+            return "";
+        },
+        "selection-sort": function (s, op, a, b, c) {
+            if (op === "compare") { return "Comparing " + s[a] + " and " + s[b] + ". Current smallest: " + s[c]; }
+            if (op === "swap") { return "Swapping " + s[b] + " and " + s[a]; }
+            if (op === "settle") { return s[a] + " is now in its correct position."; }
+            return "";
+        }
+    };
+
+    function renderBoxes(trace, state, k) {
+        var op = k === null ? null : OPNAMES[trace.op[k]];
+        var highlight = HIGHLIGHT[trace.algorithm];
+        return state.map(function (value, idx) {
+            var classes = op === null || !highlight ? "" : highlight(idx, op, trace.a[k], trace.b[k], trace.c[k]);
+            return {
+                type: "Div",
+                namespace: "dash_html_components",
+                props: {children: String(value), className: classes ? "sort-box " + classes : "sort-box"}
+            };
+        });
+    }
+
+    // One engine per algorithm page: the decoded trace, its keyframes, the displayed
+    // array (`applied` steps into the trace) and the slider position last rendered.
+    var engines = {};
+    var SWAP = 2;
+    var MIN_KEYFRAME_INTERVAL = 64;
+
+    function applySwap(trace, state, k) {
+        if (trace.op[k] === SWAP) {
+            var a = trace.a[k], b = trace.b[k];
+            var tmp = state[a];
+            state[a] = state[b];
+            state[b] = tmp;
+        }
+    }
+
+    function createEngine(trace) {
+        // Snapshot every K steps so any seek replays at most K swaps
+        var interval = Math.max(MIN_KEYFRAME_INTERVAL, trace.initial.length);
+        var keyframes = [trace.initial.slice()];
+        var state = trace.initial.slice();
+        for (var k = 0; k < trace.length; k++) {
+            applySwap(trace, state, k);
+            if ((k + 1) % interval === 0) {
+                keyframes.push(state.slice());
+            }
+        }
+        return {trace: trace, interval: interval, keyframes: keyframes, state: trace.initial.slice(), applied: 0, position: 0,
+                counters: countTotals(trace)};
+    }
+
+    // Bring engine.state to "first k steps applied"; swaps are self-inverse, so
+    // short moves in either direction replay swaps, long ones start from a keyframe.
+    function moveTo(engine, k) {
+        if (Math.abs(k - engine.applied) > engine.interval) {
+            var f = Math.floor(k / engine.interval);
+            engine.state = engine.keyframes[f].slice();
+            engine.applied = f * engine.interval;
+        }
+        while (engine.applied < k) {
+            applySwap(engine.trace, engine.state, engine.applied);
+            engine.applied += 1;
+        }
+        while (engine.applied > k) {
+            engine.applied -= 1;
+            applySwap(engine.trace, engine.state, engine.applied);
+        }
+    }
+
+    // Render slider position p (step p highlighted, or the finished array when
+    // p === length) and return [boxes, explanation, finished, counters]
+    function render(engine, p) {
+        var trace = engine.trace;
+        p = Math.max(0, Math.min(p, trace.length));
+        engine.position = p;
+        engine.shownAt = Date.now();
+        if (p === trace.length) {
+            moveTo(engine, trace.length);
+            return [renderBoxes(trace, engine.state, null), "Sorting completed!", true, renderCounters(engine, p)];
+        }
+        moveTo(engine, p + 1);
+        var describe = DESCRIBE[trace.algorithm];
+        var explanation = describe ? describe(engine.state, OPNAMES[trace.op[p]], trace.a[p], trace.b[p], trace.c[p]) : "";
+        return [renderBoxes(trace, engine.state, p), explanation, false, renderCounters(engine, p)];
+    }
+
+    // Bar chart for large arrays: frame = {values, max, highlight: [[column, color]]}
+    function drawFrame(canvas, frame) {
+        var ctx = canvas.getContext("2d");
+        var width = canvas.width, height = canvas.height;
+        var barWidth = width / frame.values.length;
+        ctx.clearRect(0, 0, width, height);
+        ctx.fillStyle = "#6c757d";
+        frame.values.forEach(function (value, column) {
+            var barHeight = value / frame.max * height;
+            ctx.fillRect(column * barWidth, height - barHeight, Math.max(barWidth, 1), barHeight);
+        });
+        frame.highlight.forEach(function (mark) {
+            var barHeight = frame.values[mark[0]] / frame.max * height;
+            ctx.fillStyle = mark[1];
+            ctx.fillRect(mark[0] * barWidth, height - barHeight, Math.max(barWidth, 2), barHeight);
+        });
+    }
+
+    // Steps to advance on a tick: one frame's worth (pace from client_pace() in
+    // pages/sorting.py), or what fell due since the last frame when ticks come late
+    function stepsDue(engine, pace) {
+        if (!pace) {
+            return 1;
+        }
+        var due = Math.round((Date.now() - engine.shownAt) / 1000 * pace.steps_per_second);
+        return Math.min(Math.max(pace.stride, due), pace.max_catch_up * pace.stride);
+    }
+
+    function triggeredBy(suffix) {
+        return window.dash_clientside.callback_context.triggered.some(function (t) {
+            return t.prop_id.endsWith(suffix);
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        playback: {
+            // Outputs: [boxes, explanation, client interval disabled, slider value, seek request, counters]
+            tick: function (n_intervals, payload, sliderValue, backClicks, endClicks, playbackMode, arrayData, sliderMax, pace) {
+                var noUpdate = window.dash_clientside.no_update;
+                var seekSlider = triggeredBy("seek-slider.value");
+                var stepBack = triggeredBy("step-back-button.n_clicks");
+                var jumpEnd = triggeredBy("jump-end-button.n_clicks");
+
+                // Server playback (always used for large arrays): the server owns the cursor,
+                // so only forward user seeks
+                if ((playbackMode || []).indexOf("client") === -1 || (arrayData && arrayData.large)) {
+                    if (!arrayData || !arrayData.trace_key) {
+                        return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+                    }
+                    var position = arrayData.position || 0;
+                    var target = null;
+                    if (seekSlider && sliderValue !== position) {
+                        target = sliderValue;
+                    } else if (stepBack) {
+                        target = Math.max(0, position - 1);
+                    } else if (jumpEnd) {
+                        target = sliderMax;
+                    }
+                    if (target === null) {
+                        return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+                    }
+                    return [noUpdate, noUpdate, noUpdate, noUpdate, {step: target, requested: Date.now()}, noUpdate];
+                }
+
+                if (!payload) {
+                    return [noUpdate, noUpdate, true, noUpdate, noUpdate, noUpdate];
+                }
+                var engine = engines[payload.algorithm];
+                if (!engine || triggeredBy("client-trace.data")) {
+                    engine = engines[payload.algorithm] = createEngine(decodeTrace(payload));
+                    var first = render(engine, 0);
+                    return [first[0], first[1], first[2], 0, noUpdate, first[3]];
+                }
+
+                var frame;
+                if (seekSlider) {
+                    if (sliderValue === engine.position) {
+                        return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+                    }
+                    frame = render(engine, sliderValue);
+                } else if (stepBack) {
+                    frame = render(engine, engine.position - 1);
+                } else if (jumpEnd) {
+                    frame = render(engine, engine.trace.length);
+                } else {
+                    // Interval tick: advance one frame (several coalesced steps at high speeds)
+                    // and stop once the sort is finished
+                    frame = render(engine, engine.position + stepsDue(engine, pace));
+                    return [frame[0], frame[1], frame[2], engine.position, noUpdate, frame[3]];
+                }
+                // Seeking leaves a running animation running, but a finished sort stays stopped
+                return [frame[0], frame[1], frame[2] ? true : noUpdate, engine.position, noUpdate, frame[3]];
+            },
+
+            // Draw a canvas frame sent by the server and show the canvas (hidden without a frame)
+            draw: function (frame) {
+                var canvas = document.getElementById("sort-canvas");
+                if (!frame || !canvas) {
+                    return {display: "none"};
+                }
+                drawFrame(canvas, frame);
+                return {display: "block", width: "100%", height: "300px"};
+            },
+
+            // Race page: one canvas per lane, frames = {algorithm: frame}. Pattern-matching
+            // ids render as the JSON of the id with its keys sorted.
+            drawLanes: function (frames, ids) {
+                return ids.map(function (id) {
+                    var canvas = document.getElementById(JSON.stringify({name: id.name, type: id.type}));
+                    var frame = frames && frames[id.name];
+                    if (!frame || !canvas) {
+                        return {display: "none"};
+                    }
+                    drawFrame(canvas, frame);
+                    return {display: "block", width: "100%", height: "150px"};
+                });
+            }
+        }
+    });
+})();
@@ -0,0 +1,172 @@
+# metrics.py
+# Prometheus text-format metrics for the Dash callbacks, served at /metrics.
+# Every server-side callback is dispatched through Dash's update endpoint, so
+# timing that request covers all of them. Clientside callbacks never reach the
+# server and are not counted. Each gunicorn worker keeps its own numbers.
+import json
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class CallbackMetrics:
+    """Call counts plus latency and payload-size histograms, per callback."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {}  # (callback, trigger, status) -> count
+        self.histograms = {
+            "dash_callback_duration_seconds": ({}, LATENCY_BUCKETS, "Server callback latency in seconds."),
+            "dash_callback_request_bytes": ({}, SIZE_BUCKETS, "Size of the callback request body in bytes."),
+            "dash_callback_response_bytes": ({}, SIZE_BUCKETS, "Size of the callback response body in bytes."),
+        }
+
+    def observe(self, callback, trigger, status, seconds, request_bytes, response_bytes):
+        with self._lock:
+            key = (callback, trigger, status)
+            self.calls[key] = self.calls.get(key, 0) + 1
+            for name, value in (("dash_callback_duration_seconds", seconds),
+                                ("dash_callback_request_bytes", request_bytes),
+                                ("dash_callback_response_bytes", response_bytes)):
+                series, buckets, _ = self.histograms[name]
+                if callback not in series:
+                    series[callback] = Histogram(buckets)
+                series[callback].observe(value)
+
+    def render(self):
+        lines = [
+            "# HELP dash_callback_calls_total Server callback invocations by trigger and HTTP status.",
+            "# TYPE dash_callback_calls_total counter",
+        ]
+        with self._lock:
+            for (callback, trigger, status), count in sorted(self.calls.items()):
+                lines.append(f"dash_callback_calls_total{_labels([('callback', callback), ('trigger', trigger), ('status', status)])} {count}")
+            for name, (series, buckets, help_text) in self.histograms.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for callback, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels([('callback', callback), ('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels([('callback', callback)])} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels([('callback', callback)])} {histogram.count}")
+
+        # Trace cache occupancy, for sizing TRACE_CACHE_MAX_BYTES (imported here: it pulls in numpy)
+        from sorting_algorithms.trace_cache import trace_cache
+        for name, kind, value in (("trace_cache_entries", "gauge", len(trace_cache)),
+                                  ("trace_cache_bytes", "gauge", trace_cache.nbytes),
+                                  ("trace_cache_hits_total", "counter", trace_cache.hits),
+                                  ("trace_cache_misses_total", "counter", trace_cache.misses)):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Label for requests naming no known callback, or a trigger that is not one of its inputs:
+# the request body comes from the client, so label values are only ever taken from the app
+UNKNOWN = "unknown"
+
+
+def _prop_label(prop_id):
+    # 'sort-interval.n_intervals'; pattern-matching ids collapse to their type
+    # ('array-input.value') so the label does not grow with the number of inputs
+    component, _, prop = prop_id.rpartition(".")
+    if component.startswith("{"):
+        return f"{json.loads(component).get('type', 'pattern')}.{prop}"
+    return prop_id
+
+
+def _trigger(body, inputs):
+    """Trigger label of a callback request, one of `inputs` (labels of the callback's inputs)."""
+    changed = body.get("changedPropIds") or []
+    if not changed:
+        return "initial"
+    if not isinstance(changed, list):
+        return UNKNOWN
+    try:
+        label = _prop_label(str(changed[0]))
+    except (ValueError, AttributeError):
+        return UNKNOWN
+    return label if label in inputs else UNKNOWN
+
+
+def instrument_callbacks(app):
+    """Time every Dash callback request on app.server and serve the results at /metrics."""
+    metrics = CallbackMetrics()
+    server = app.server
+    callbacks = {}  # Dash output key -> (callback function name, labels of its inputs)
+
+    def resolve(output):
+        # Only outputs of registered callbacks are cached (and become label values)
+        if not isinstance(output, str):
+            return UNKNOWN, set()
+        if output not in callbacks:
+            entry = app.callback_map.get(output)
+            if entry is None:
+                return UNKNOWN, set()
+            inputs = {_prop_label(f"{item['id']}.{item['property']}") for item in entry.get("inputs", [])}
+            callbacks[output] = (getattr(entry.get("callback"), "__name__", UNKNOWN), inputs)
+        return callbacks[output]
+
+    @server.before_request
+    def start_callback_timer():
+        if request.path.endswith("/_dash-update-component"):
+            g.callback_started = time.perf_counter()
+
+    def record(status, response_bytes):
+        started = g.pop("callback_started", None)
+        if started is not None:
+            body = request.get_json(silent=True)
+            body = body if isinstance(body, dict) else {}
+            name, inputs = resolve(body.get("output", ""))
+            metrics.observe(
+                name,
+                _trigger(body, inputs) if name != UNKNOWN else UNKNOWN,
+                status,
+                time.perf_counter() - started,
+                request.content_length or 0,
+                response_bytes,
+            )
+
+    @server.after_request
+    def record_callback(response):
+        record(response.status_code, response.calculate_content_length() or 0)
+        return response
+
+    # Unhandled callback exceptions skip after_request; count them as 500s here
+    @server.teardown_request
+    def record_failed_callback(exc):
+        if exc is not None:
+            record(500, 0)
+
+    @server.route("/metrics")
+    def serve_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    return metrics
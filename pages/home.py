@@ -1,10 +1,6 @@
-import dash
-from dash import dcc, html
+from dash import html
 import dash_bootstrap_components as dbc
 
-# Initialize the Dash app for this page
-home_app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-
 # Home page layout
 home_layout = html.Div(
     children=[
@@ -27,7 +23,8 @@ home_layout = html.Div(
                             children=[
                                 dbc.Button("Quick Sort", color="primary", className="btn-block fade-in", href="/input-array?method=quick-sort"),
                                 dbc.Button("Selection Sort", color="success", className="btn-block fade-in", href="/input-array?method=selection-sort"),
-                                dbc.Button("Insertion Sort", color="warning", className="btn-block fade-in", href="/input-array?method=insertion-sort")
+                                dbc.Button("Insertion Sort", color="warning", className="btn-block fade-in", href="/input-array?method=insertion-sort"),
+                                dbc.Button("Race All Three", color="info", className="btn-block fade-in", href="/race")
                             ]
                         )
                     ],
@@ -51,10 +48,3 @@ home_layout = html.Div(
     ],
     className="p-4"
 )
-
-# Set the layout of the app
-home_app.layout = home_layout
-
-# If this is the only page being rendered, this line is typically used to run the page independently
-if __name__ == "__main__":
-    home_app.run_server(debug=True)
\ No newline at end of file
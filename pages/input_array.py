@@ -1,7 +1,13 @@
+import random
 import dash
-from dash import dcc, html, Input, Output, State, ALL
+from dash import dcc, html, Input, Output, State, ALL, ClientsideFunction
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
+from sorting_algorithms.distributions import DISTRIBUTIONS
+
+# Large-input mode: generated arrays, drawn as a bar chart on the sorting page
+LARGE_INPUT_MIN = 1000
+LARGE_INPUT_MAX = 100000
 
 # Updated Input Array Page Layout (Full Width Fix)
 input_array_layout = html.Div(
@@ -93,6 +99,88 @@ input_array_layout = html.Div(
             className="w-100 m-0 p-0"
         ),
         
+        # Bulk Input: paste values or upload a CSV/text file instead of typing each one
+        dbc.Row(
+            dbc.Col(
+                html.Div(
+                    children=[
+                        html.H3("Paste or Upload an Array", className="text-center mt-5 mb-4"),
+                        dcc.Textarea(
+                            id='bulk-array-text',
+                            placeholder='Values separated by commas, spaces or new lines, e.g. 42, 17, 8, 99',
+                            className='mb-3',
+                            style={'width': '100%', 'height': '120px'}
+                        ),
+                        dcc.Upload(
+                            id='bulk-array-upload',
+                            children=html.Div(["Drag and drop or ", html.A("select a CSV/text file")]),
+                            accept='.csv,.txt,text/plain,text/csv',
+                            className='mb-3',
+                            style={'width': '100%', 'padding': '20px', 'borderWidth': '1px', 'borderStyle': 'dashed',
+                                   'borderRadius': '5px', 'textAlign': 'center'}
+                        ),
+                        html.Div(id='bulk-array-feedback', className='mb-3'),
+                        dbc.Button(
+                            "Use These Values",
+                            id='bulk-array-button',
+                            color="primary",
+                            className="btn-block mb-3",
+                            n_clicks=0
+                        )
+                    ],
+                    className="text-center"
+                ),
+                width=12
+            ),
+            className="w-100 m-0 p-0"
+        ),
+
+        # Large Input: generate 1,000 to 100,000 elements from a distribution
+        dbc.Row(
+            dbc.Col(
+                html.Div(
+                    children=[
+                        html.H3(f"Large Input ({LARGE_INPUT_MIN:,} to {LARGE_INPUT_MAX:,} elements)", className="text-center mt-5 mb-4"),
+                        dcc.Input(
+                            id='large-size-input',
+                            type='number',
+                            min=LARGE_INPUT_MIN,
+                            max=LARGE_INPUT_MAX,
+                            value=10000,
+                            placeholder='No. of Array Elements',
+                            className='mb-3',
+                            style={'width': '100%', 'textAlign': 'center', 'fontWeight': '600'}
+                        ),
+                        dcc.Input(
+                            id='large-seed-input',
+                            type='number',
+                            min=0,
+                            placeholder='Seed (random if empty)',
+                            className='mb-3',
+                            style={'width': '100%', 'textAlign': 'center'}
+                        ),
+                        dcc.Dropdown(
+                            id='distribution-dropdown',
+                            options=[{'label': label, 'value': name} for name, label in DISTRIBUTIONS.items()],
+                            value='random',
+                            clearable=False,
+                            className='mb-3'
+                        ),
+                        dbc.Button(
+                            "Generate Large Array",
+                            id='large-array-button',
+                            color="primary",
+                            className="btn-block mb-3",
+                            n_clicks=0
+                        )
+                    ],
+                    className="text-center"
+                ),
+                width=12
+            ),
+            className="w-100 m-0 p-0"
+        ),
+
         # Footer or Information Section
         dbc.Row(
             dbc.Col(
@@ -116,7 +204,7 @@ input_array_layout = html.Div(
 def register_callbacks(app):
     @app.callback(
         Output('array-input-container', 'children'),
-        Output('submit-button', 'disabled'),
+        Output('submit-button', 'disabled', allow_duplicate=True),
         Input('generate-array-button', 'n_clicks'),
         State('num-elements-input', 'value'),
         prevent_initial_call=True  # Prevent the callback from firing on page load
@@ -142,29 +230,16 @@ def register_callbacks(app):
                 )
             )
         
-        return inputs, False  # Return the input boxes and enable submit button
+        return inputs, True  # Submit is enabled by the validation below once every box is filled
 
-    # Callback to ensure two-digit input and auto-focus to the next input box
-    @app.callback(
+    # Two-digit validation, auto-focus to the next box and enabling Submit run in the
+    # browser (assets/input_array.js), so typing costs no server round trips
+    app.clientside_callback(
+        ClientsideFunction(namespace='inputArray', function_name='validate'),
         Output({'type': 'array-input', 'index': ALL}, 'value'),
-        Output({'type': 'array-input', 'index': ALL}, 'n_submit'),
-        Input({'type': 'array-input', 'index': ALL}, 'value'),
-        prevent_initial_call=True
+        Output('submit-button', 'disabled'),
+        Input({'type': 'array-input', 'index': ALL}, 'value')
     )
-    def enforce_two_digit_and_autofocus(values):
-        if not values:
-            raise PreventUpdate  # Avoid unnecessary updates
-
-        updated_values = list(values)  # Copy of values to modify
-        n_submit_list = [None] * len(values)  # Initialize n_submit list
-
-        for i, val in enumerate(values):
-            if val is not None and (val < 10 or val > 99):
-                updated_values[i] = None  # Reset invalid input
-            elif val is not None and 10 <= val <= 99 and i < len(values) - 1:
-                n_submit_list[i + 1] = 1  # Auto-focus on the next box
-
-        return updated_values, n_submit_list  # ✅ Ensure correct return values
 
     # Callback to store array data and redirect to the sorting page
     @app.callback(
@@ -177,7 +252,8 @@ def register_callbacks(app):
     prevent_initial_call=True
 )
     def store_array_data_and_redirect(n_clicks, array_values,num_elements,search):
-        if not array_values or any(val is None for val in array_values):
+        # Checked again here: the browser-side validation is only a convenience
+        if not array_values or any(val is None or not 10 <= val <= 99 for val in array_values):
             raise dash.exceptions.PreventUpdate
 
 
@@ -187,11 +263,79 @@ def register_callbacks(app):
             'array_values': array_values
         }
 
-        # Extract Sorting Method from URL
-        query_params = dict(param.split('=') for param in search.lstrip('?').split('&') if '=' in param)
-        method = query_params.get("method", "")
+        return array_data, sorting_page_path(num_elements, search)
 
-        if method:
-            return array_data, f"/sorting?num={num_elements}&method={method}"  # Redirect with sorting method
+    # Callback to store a generated large array and redirect to the sorting page
+    @app.callback(
+        Output('array-data-store', 'data', allow_duplicate=True),
+        Output('url', 'pathname', allow_duplicate=True),
+        Input('large-array-button', 'n_clicks'),
+        State('large-size-input', 'value'),
+        State('distribution-dropdown', 'value'),
+        State('large-seed-input', 'value'),
+        State('url', 'search'),
+        prevent_initial_call=True
+    )
+    def store_large_array_and_redirect(n_clicks, size, distribution, seed, search):
+        if not n_clicks or not size or size < LARGE_INPUT_MIN or size > LARGE_INPUT_MAX:
+            raise PreventUpdate
+
+        # Only the recipe is stored; the sorting page regenerates the values from the seed
+        array_data = {
+            'num_elements': size,
+            'distribution': distribution,
+            'seed': int(seed) if seed is not None else random.randrange(2 ** 32)
+        }
+        return array_data, sorting_page_path(size, search)
+
+    # Show which file was picked, without sending it to the server until it is used
+    app.clientside_callback(
+        ClientsideFunction(namespace='inputArray', function_name='uploaded'),
+        Output('bulk-array-feedback', 'children'),
+        Input('bulk-array-upload', 'filename'),
+        prevent_initial_call=True
+    )
+
+    # Callback to parse pasted or uploaded values and redirect to the sorting page
+    @app.callback(
+        Output('array-data-store', 'data', allow_duplicate=True),
+        Output('url', 'pathname', allow_duplicate=True),
+        Output('bulk-array-feedback', 'children', allow_duplicate=True),
+        Input('bulk-array-button', 'n_clicks'),
+        State('bulk-array-text', 'value'),
+        State('bulk-array-upload', 'contents'),
+        State('url', 'search'),
+        prevent_initial_call=True
+    )
+    def store_bulk_array_and_redirect(n_clicks, text, contents, search):
+        if not n_clicks or not (text or contents):
+            raise PreventUpdate
+        from sorting_algorithms.array_input import parse_values, text_chunks, upload_chunks, validate_values  # Needs numpy
+
+        # An uploaded file wins over the paste box
+        chunks = upload_chunks(contents) if contents else text_chunks(text)
+        try:
+            values = validate_values(parse_values(chunks, LARGE_INPUT_MAX), LARGE_INPUT_MAX)
+        except ValueError as exc:
+            return dash.no_update, dash.no_update, dbc.Alert(str(exc), color="danger")
+
+        # Large arrays stay on the server (like the generated ones, whose recipe is stored);
+        # the session store, sent with every playback tick, only carries their key
+        from sorting_algorithms.trace_store import trace_store
+        if trace_store.wants(values):
+            array_data = {'num_elements': len(values), 'array_key': trace_store.save_array(values)}
         else:
-            return array_data, "/sorting"  # Redirect without sorting method
\ No newline at end of file
+            array_data = {'num_elements': len(values), 'array_values': values.tolist()}
+        return array_data, sorting_page_path(len(values), search), None
+
+
+# Sorting page URL, keeping the method from the input page's query string
+def sorting_page_path(num_elements, search):
+    # Extract Sorting Method from URL
+    query_params = dict(param.split('=') for param in (search or '').lstrip('?').split('&') if '=' in param)
+    method = query_params.get("method", "")
+
+    if method:
+        return f"/sorting?num={num_elements}&method={method}"  # Redirect with sorting method
+    else:
+        return "/sorting"  # Redirect without sorting method
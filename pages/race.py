@@ -0,0 +1,312 @@
+import logging
+import time
+import dash
+from dash import dcc, html, Input, Output, State, ALL, ClientsideFunction
+import dash_bootstrap_components as dbc
+from dash.exceptions import PreventUpdate
+from sorting_algorithms.registry import algorithm_names, get_algorithm
+from pages.sorting import (BASE_STEPS_PER_SECOND, CANVAS_COLUMNS, MAX_BOX_ELEMENTS, PLAYBACK_SPEEDS, SERVER_FRAME_INTERVAL,
+                           array_recipe, frame_at, has_input, input_values, playback_pace, random_array, render_array, steps_due, store_trace)
+from profiling import log_sampled
+
+# Race mode: every registered algorithm sorts the same array (from array-data-store)
+# on one shared timeline. A single interval advances all lanes by the same number
+# of steps per tick, so a lane's finish time is proportional to its step count.
+# Large arrays have their traces built first, in a background callback; the race
+# starts once every lane's trace is complete, since finish times depend on them.
+
+logger = logging.getLogger(__name__)
+
+# Races start at 4x: three lanes of boxes finish in well under a minute
+RACE_DEFAULT_SPEED = BASE_STEPS_PER_SECOND * 4
+
+DEFAULT_STATUS = "Click Start Race to run every algorithm on the same array"
+
+
+# Layout for the Race Page: one lane per registered algorithm
+def race_layout():
+    lanes = []
+    for name in algorithm_names():
+        algorithm = get_algorithm(name)
+        lanes.append(
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        children=[
+                            html.H4(algorithm.label, className="text-center mb-2"),
+                            html.Div(id={"type": "race-boxes", "name": name}, className=f"sort-boxes {name}"),
+                            html.Canvas(id={"type": "race-canvas", "name": name}, width=CANVAS_COLUMNS, height=150, style={"display": "none"}),
+                            html.Div(id={"type": "race-stats", "name": name}, className="race-stats text-center mt-2 p-2"),
+                        ],
+                        className="race-lane mb-3"
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            )
+        )
+
+    return html.Div(
+        children=[
+            # Header Section
+            dbc.Row(
+                dbc.Col(
+                    html.H1("Sorting Race", className="text-center my-4"),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Buttons for Start and Back
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        children=[
+                            dbc.Button(
+                                "Start Race",
+                                id="race-start-button",
+                                color="primary",
+                                className="btn-block mb-3",
+                                n_clicks=0
+                            ),
+                            dbc.Button(
+                                "Back",
+                                id="race-back-button",
+                                href="/",
+                                color="secondary",
+                                className="btn-block mb-3"
+                            ),
+                        ],
+                        className="text-center"
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Race Speed, shared by every lane (see playback_pace in pages/sorting.py)
+            dbc.Row(
+                dbc.Col(
+                    dcc.Dropdown(
+                        id="race-speed",
+                        options=[{"label": label, "value": value} for value, label in PLAYBACK_SPEEDS.items()],
+                        value=RACE_DEFAULT_SPEED,
+                        clearable=False,
+                        className="mb-3"
+                    ),
+                    md=4
+                ),
+                justify="center",
+                className="w-100 m-0 p-0"
+            ),
+
+            # Background step generation for large arrays: progress and Cancel
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        id="race-build-status",
+                        children=[
+                            dbc.Progress(id="race-build-progress", value=100, striped=True, animated=True, className="mb-2"),
+                            dbc.Button(
+                                "Cancel",
+                                id="race-cancel-button",
+                                color="danger",
+                                className="btn-block mb-3",
+                                n_clicks=0,
+                                disabled=True
+                            ),
+                        ],
+                        className="text-center",
+                        style={"display": "none"}
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+            dcc.Store(id="race-build-request"),
+            dcc.Store(id="race-build-done"),  # Keys of the last finished background build
+
+            # Race Status
+            dbc.Row(
+                dbc.Col(
+                    html.Div(DEFAULT_STATUS, id="race-status", className="step-explanation text-center mb-3 p-3"),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Lanes
+            *lanes,
+
+            # One interval drives every lane; race-state holds the shared clock
+            dcc.Interval(id="race-interval", interval=SERVER_FRAME_INTERVAL, n_intervals=0, disabled=True),
+            dcc.Store(id="race-state"),
+
+            # Large arrays: canvas frames per lane, drawn by assets/playback.js
+            dcc.Store(id="race-frames")
+        ],
+        className="p-0 m-0 w-100"
+    )
+
+
+# Live counters for one lane after the first k steps
+def lane_stats(algorithm, trace, k):
+    counts = " | ".join(f"{label}: {value:,}" for label, value in algorithm.counts(trace, k).items())
+    return f"{counts} | Step {k:,} of {len(trace):,}"
+
+
+# Finish line for one lane: its place among the lanes and when it got there on the shared timeline
+def finish_stats(trace, place, seconds):
+    if trace.truncated:
+        return f"Stopped at the step limit after {len(trace):,} steps ({seconds:.1f}s)"
+    return f"Finished #{place} after {len(trace):,} steps ({seconds:.1f}s)"
+
+
+# Callbacks for the Race Page
+def register_race_callbacks(app):
+    @app.callback(
+        [Output({"type": "race-boxes", "name": ALL}, "children"),
+         Output({"type": "race-stats", "name": ALL}, "children"),
+         Output("race-frames", "data"),
+         Output("race-interval", "disabled"),
+         Output("race-interval", "interval"),
+         Output("race-state", "data"),
+         Output("race-status", "children"),
+         Output("race-build-request", "data")],
+        [Input("race-interval", "n_intervals"),
+         Input("race-start-button", "n_clicks"),
+         Input("race-cancel-button", "n_clicks")],
+        [State("array-data-store", "data"),
+         State("race-state", "data"),
+         State("race-interval", "disabled"),
+         State("race-speed", "value")]
+    )
+    def update_race(n_intervals, start_clicks, cancel_clicks, array_data, race_state, interval_disabled, speed):
+        from sorting_algorithms.trace_cache import trace_cache, trace_key
+        from sorting_algorithms.trace_store import trace_store
+
+        ctx = dash.callback_context
+        button_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
+        names = [output["id"]["name"] for output in ctx.outputs_list[0]]
+
+        # The array chosen on the input page, or a random one when there is none
+        if not has_input(array_data):
+            array_data = {"array_values": random_array()}
+        arr = input_values(array_data)
+        large = len(arr) > MAX_BOX_ELEMENTS
+        interval = playback_pace(speed, SERVER_FRAME_INTERVAL)[0]
+
+        # Page load: every lane shows the input array
+        if button_id is None:
+            boxes, frames = [], {}
+            for name in names:
+                lane_boxes, frames[name] = render_array(get_algorithm(name), arr)
+                boxes.append(lane_boxes)
+            return boxes, [""] * len(names), frames, True, interval, None, DEFAULT_STATUS, dash.no_update
+
+        if button_id == "race-start-button" and not start_clicks:
+            raise PreventUpdate
+        if button_id == "race-interval" and (interval_disabled or not race_state):
+            raise PreventUpdate  # Stale tick after the race ended
+
+        # Cancel stops the background build (see build_race_traces below) and the race waiting on it
+        if button_id == "race-cancel-button":
+            if not cancel_clicks or not (race_state or {}).get("building"):
+                raise PreventUpdate
+            unchanged = [dash.no_update] * len(names)
+            return unchanged, unchanged, dash.no_update, True, interval, None, "Step generation cancelled.", dash.no_update
+
+        # Large arrays: build the lanes' missing traces in the background, then start the race
+        # (ticks meanwhile only check whether the build has finished). Keys are computed here,
+        # never read back from the browser.
+        if trace_store.wants(arr) and (button_id == "race-start-button" or race_state.get("building")):
+            missing = [name for name in names if trace_cache.find(trace_key(name, arr, get_algorithm(name).default_options())) is None]
+            if missing and button_id == "race-start-button":
+                request = {"array": array_recipe(array_data),
+                           "lanes": [{"algorithm": name, "options": get_algorithm(name).default_options()} for name in missing]}
+                return [dash.no_update] * len(names), [""] * len(names), dash.no_update, False, SERVER_FRAME_INTERVAL, {"building": True}, "Generating steps...", request
+            if missing:
+                raise PreventUpdate
+            button_id = "race-start-button"  # Every trace is ready: the race starts now
+
+        # Every lane runs with its algorithm's default options
+        traces = {}
+        for name in names:
+            algorithm = get_algorithm(name)
+            traces[name] = trace_cache.get_or_build(name, arr, algorithm.steps, options=algorithm.default_options())
+
+        # Large races are sped up so the longest lane finishes in bounded time
+        longest = max(len(trace) for _, trace in traces.values())
+        interval, stride, steps_per_second = playback_pace(speed, SERVER_FRAME_INTERVAL, longest if large else 0)
+
+        # The shared clock: `position` steps in, `clock` seconds of race time (the time the
+        # steps take at the speeds they were played at), and each lane's finish time on it
+        if button_id == "race-start-button":
+            race_state = {"position": 0, "clock": 0.0, "finish": {}}
+        else:
+            advance = steps_due(steps_per_second, stride, time.time() - race_state["shown_at"])
+            for name, (_, trace) in traces.items():
+                if race_state["position"] < len(trace) <= race_state["position"] + advance:
+                    race_state["finish"][name] = race_state["clock"] + (len(trace) - race_state["position"]) / steps_per_second
+            race_state["position"] += advance
+            race_state["clock"] += advance / steps_per_second
+        race_state["shown_at"] = time.time()
+        position = race_state["position"]
+
+        # Places go by step count: the shared clock reaches shorter traces first, and
+        # lanes with the same count tie (1, 1, 3)
+        lengths = [len(traces[name][1]) for name in names]
+        boxes, stats, frames = [], [], {}
+        for name in names:
+            trace = traces[name][1]
+            values, step = frame_at(trace, min(position, len(trace)))
+            lane_boxes, frames[name] = render_array(get_algorithm(name), values, step)
+            boxes.append(lane_boxes)
+            if position >= len(trace):
+                place = 1 + sum(length < len(trace) for length in lengths)
+                stats.append(finish_stats(trace, place, race_state["finish"].get(name, 0.0)))
+            else:
+                stats.append(lane_stats(get_algorithm(name), trace, position + 1))  # frame_at shows step `position` applied
+
+        finished = position >= longest
+        status = "Race finished!" if finished else f"Racing... step {position + 1:,}"
+        log_sampled(logger, "race frame position=%d stride=%d", position, stride)
+        return boxes, stats, frames, finished, interval, race_state, status, dash.no_update
+
+    # Trace generation for large races, one lane after the other, in the background callback
+    # manager's process (like build_trace on the sorting page); Cancel stops it
+    @app.callback(
+        Output("race-build-done", "data"),
+        Input("race-build-request", "data"),
+        background=True,
+        progress=[Output("race-build-progress", "label")],
+        running=[(Output("race-build-status", "style"), {"display": "block"}, {"display": "none"}),
+                 (Output("race-cancel-button", "disabled"), False, True)],
+        cancel=[Input("race-cancel-button", "n_clicks")],
+        interval=500,
+        prevent_initial_call=True
+    )
+    def build_race_traces(set_progress, request):
+        if not request:
+            raise PreventUpdate
+        arr = input_values(request["array"])
+        keys = []
+        for lane in request["lanes"]:
+            algorithm = get_algorithm(lane["algorithm"])
+            set_progress((f"{algorithm.label}: generating steps for {len(arr):,} elements...",))
+
+            def report(written, label=algorithm.label):
+                set_progress((f"{label}: {written:,} steps generated",))
+
+            key, trace = store_trace(algorithm, arr, lane["options"], progress=report)
+            logger.info("background race trace built key=%s steps=%d", key, len(trace))
+            keys.append(key)
+        return keys
+
+    # Draw the large-array lanes whenever the server sends new canvas frames
+    app.clientside_callback(
+        ClientsideFunction(namespace="playback", function_name="drawLanes"),
+        Output({"type": "race-canvas", "name": ALL}, "style"),
+        Input("race-frames", "data"),
+        State({"type": "race-canvas", "name": ALL}, "id")
+    )
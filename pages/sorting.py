@@ -0,0 +1,899 @@
+import logging
+import math
+import random
+import time
+import dash
+from dash import dcc, html, Input, Output, State, ALL, ClientsideFunction, Patch
+import dash_bootstrap_components as dbc
+from dash.exceptions import PreventUpdate
+from flask import abort, send_from_directory
+from pages.input_array import LARGE_INPUT_MAX, LARGE_INPUT_MIN
+from sorting_algorithms.distributions import DISTRIBUTIONS
+from sorting_algorithms.registry import get_algorithm
+from profiling import log_sampled
+
+# numpy and the trace modules are imported by the functions that use them, so
+# importing this page (and starting a worker) stays cheap; see startup_time.py
+
+DEFAULT_EXPLANATION = "Click Start Button for sorting visualization"
+
+logger = logging.getLogger(__name__)
+
+# Arrays longer than this are drawn as bars on a canvas instead of one circle per element
+MAX_BOX_ELEMENTS = 15
+
+# Large-input playback: bars per frame, frames per run and the tick interval in ms
+CANVAS_COLUMNS = 1000
+LARGE_INPUT_FRAMES = 400
+LARGE_INPUT_INTERVAL = 250
+SMALL_INPUT_INTERVAL = 1500
+
+# Playback speeds in steps per second, {value: label}; 1x is one step per SMALL_INPUT_INTERVAL
+BASE_STEPS_PER_SECOND = 1000 / SMALL_INPUT_INTERVAL
+PLAYBACK_SPEEDS = {
+    **{BASE_STEPS_PER_SECOND * factor: f"{factor:g}x" for factor in (0.25, 0.5, 1, 2, 4)},
+    **{rate: f"{rate:,} steps/s" for rate in (10, 100, 1000, 5000)},
+}
+
+# Fastest frame rate each playback mode renders (ms between frames); faster speeds
+# coalesce several steps into one frame. The server also renders large arrays.
+SERVER_FRAME_INTERVAL = LARGE_INPUT_INTERVAL
+CLIENT_FRAME_INTERVAL = 50
+
+# A tick that comes late skips the frames due meanwhile, but at most this many
+MAX_CATCH_UP_FRAMES = 4
+
+# Finished runs kept (per session) for the complexity chart
+MAX_RUN_HISTORY = 200
+
+# Bar colours for the step being shown, by op
+BAR_COLORS = {
+    "compare": "orange",
+    "swap": "red",
+    "shift": "lightblue",
+    "pivot": "yellow",
+    "settle": "lightgreen",
+    "lift": "yellow",
+    "place": "lightgreen",
+}
+
+
+def random_array(size=10):
+    return [random.randint(1, 99) for _ in range(size)]
+
+
+# Large arrays are stored as {num_elements, distribution, seed} and regenerated
+# on the server, or (pasted and uploaded ones) as {num_elements, array_key} and
+# read from the trace store, so the session store stays small however long the array is
+def input_values(array_data):
+    if array_data.get("array_values"):
+        return array_data["array_values"]
+    if array_data.get("array_key"):
+        from sorting_algorithms.trace_store import trace_store
+        values = trace_store.load_array(array_data["array_key"])
+        if values is None:
+            logger.warning("stored array %s is gone; using a random array", array_data["array_key"])
+            return random_array()
+        return values
+    # The recipe comes back from the browser, so the input page's limits are checked again here
+    size, distribution, seed = array_data.get("num_elements"), array_data.get("distribution"), array_data.get("seed")
+    if not (isinstance(size, int) and LARGE_INPUT_MIN <= size <= LARGE_INPUT_MAX and distribution in DISTRIBUTIONS
+            and (seed is None or (isinstance(seed, int) and seed >= 0))):
+        logger.warning("invalid array recipe %r; using a random array", {"num_elements": size, "distribution": distribution, "seed": seed})
+        return random_array()
+    from sorting_algorithms.distributions import generate_array
+    return generate_array(size, distribution, seed)
+
+
+def has_input(array_data):
+    return bool(array_data) and any(array_data.get(name) for name in ("array_values", "array_key", "distribution"))
+
+
+# What a background process needs to regenerate the input array (see build_trace)
+def array_recipe(array_data):
+    return {name: array_data[name] for name in ("array_values", "array_key", "num_elements", "distribution", "seed") if name in array_data}
+
+
+# Streams one large trace into the trace store; run by background callbacks in their own process.
+# Returns (key, trace); the key is computed here, since build requests come from the browser.
+def store_trace(algorithm, arr, options, progress=None):
+    from sorting_algorithms.trace_cache import TRACE_MAX_STEPS, trace_key
+    from sorting_algorithms.trace_store import trace_store
+    options = algorithm.resolve_options(options)
+    key = trace_key(algorithm.name, arr, options)
+    return key, trace_store.save(key, algorithm.name, arr, algorithm.steps(list(arr), **options), max_steps=TRACE_MAX_STEPS, progress=progress)
+
+
+def reshuffled(array_data, size):
+    if (array_data.get("distribution") or array_data.get("array_key")) and size >= LARGE_INPUT_MIN:
+        return {"num_elements": size, "distribution": array_data.get("distribution", "random"), "seed": random.randrange(2 ** 32)}
+    return {"array_values": random_array(size)}
+
+
+# Layout for the Sorting Visualization Page, shared by every registered algorithm
+def sorting_layout(algorithm):
+    return html.Div(
+        children=[
+            # Header Section
+            dbc.Row(
+                dbc.Col(
+                    html.H1(f"{algorithm.label} Visualization", className="text-center my-4"),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Buttons for Start, Restart, and Back
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        children=[
+                            dbc.Button(
+                                "Start Sorting",
+                                id="sort-start-button",
+                                color="primary",
+                                className="btn-block mb-3",
+                                n_clicks=0
+                            ),
+                            dbc.Button(
+                                "Restart Sorting",
+                                id="sort-restart-button",
+                                color="warning",
+                                className="btn-block mb-3",
+                                n_clicks=0
+                            ),
+                            dbc.Button(
+                                "Race All Algorithms",
+                                id="sort-race-button",
+                                href="/race",
+                                color="info",
+                                className="btn-block mb-3"
+                            ),
+                            dbc.Button(
+                                "Back",
+                                id="sort-back-button",
+                                href="/",
+                                color="secondary",
+                                className="btn-block mb-3"
+                            ),
+                        ],
+                        className="text-center"
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Playback Mode: animate in the browser, or tick every frame on the server
+            dbc.Row(
+                dbc.Col(
+                    dbc.Checklist(
+                        id="sort-playback-mode",
+                        options=[{"label": "Animate in browser", "value": "client"}],
+                        value=["client"],
+                        switch=True,
+                        className="d-flex justify-content-center mb-3"
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Playback Speed: from a quarter of the default pace up to thousands of steps a second
+            dbc.Row(
+                dbc.Col(
+                    dcc.Dropdown(
+                        id="sort-speed",
+                        options=[{"label": label, "value": value} for value, label in PLAYBACK_SPEEDS.items()],
+                        value=BASE_STEPS_PER_SECOND,
+                        clearable=False,
+                        className="mb-3"
+                    ),
+                    md=4
+                ),
+                justify="center",
+                className="w-100 m-0 p-0"
+            ),
+
+            # Algorithm Options (e.g. quick sort pivot strategy), one dropdown each
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Dropdown(
+                            id={"type": "sort-option", "name": name},
+                            options=[{"label": label, "value": value} for value, label in choices.items()],
+                            value=next(iter(choices)),
+                            clearable=False,
+                            className="mb-3"
+                        ),
+                        md=4
+                    )
+                    for name, choices in algorithm.options.items()
+                ],
+                justify="center",
+                className="w-100 m-0 p-0"
+            ),
+
+            # Background step generation for large arrays: progress and Cancel
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        id="sort-build-status",
+                        children=[
+                            dbc.Progress(id="sort-build-progress", value=100, striped=True, animated=True, className="mb-2"),
+                            dbc.Button(
+                                "Cancel",
+                                id="sort-cancel-button",
+                                color="danger",
+                                className="btn-block mb-3",
+                                n_clicks=0,
+                                disabled=True
+                            ),
+                        ],
+                        className="text-center",
+                        style={"display": "none"}
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+            dcc.Store(id="sort-build-request"),
+            dcc.Store(id="sort-build-done"),  # Key of the last finished background build
+
+            # Dynamic Array Display
+            dbc.Row(
+                dbc.Col(
+                    html.Div(id="sort-array-container", className=f"sort-boxes {algorithm.name}"),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Large arrays: one bar chart canvas, drawn by assets/playback.js from sort-canvas-frame
+            dbc.Row(
+                dbc.Col(
+                    html.Canvas(id="sort-canvas", width=CANVAS_COLUMNS, height=300, style={"display": "none"}),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Seek Controls: scrub through the steps, step back, or jump to the end
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        children=[
+                            dcc.Slider(
+                                id="sort-seek-slider",
+                                min=0,
+                                max=0,
+                                step=1,
+                                value=0,
+                                marks=None,
+                                tooltip={"placement": "bottom"},
+                                className="mb-3"
+                            ),
+                            dbc.Button(
+                                "Step Back",
+                                id="sort-step-back-button",
+                                color="secondary",
+                                className="btn-block mb-3",
+                                n_clicks=0
+                            ),
+                            dbc.Button(
+                                "Jump to End",
+                                id="sort-jump-end-button",
+                                color="secondary",
+                                className="btn-block mb-3",
+                                n_clicks=0
+                            ),
+                        ],
+                        className="text-center"
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Step Explanation
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        DEFAULT_EXPLANATION,
+                        id="sort-step-explanation",
+                        className="step-explanation text-center mt-3 p-3"
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Live Counters: running totals up to the step being shown
+            dbc.Row(
+                dbc.Col(
+                    html.Div(id="sort-counters", className="sort-counters mt-3"),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+
+            # Complexity: totals of the session's finished runs against n² and n log n
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        id="sort-complexity",
+                        children=[
+                            dbc.RadioItems(
+                                id="sort-complexity-counter",
+                                options=[{"label": label, "value": label} for label in algorithm.counters],
+                                value=next(iter(algorithm.counters)),
+                                inline=True,
+                                className="d-flex justify-content-center mb-2"
+                            ),
+                            dcc.Graph(id="sort-complexity-graph", config={"displayModeBar": False}),
+                        ],
+                        className="mt-3",
+                        style={"display": "none"}
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+            dcc.Store(id="sort-run-totals"),
+            dcc.Store(id="sort-run-history", storage_type="session"),
+
+            # Export: render the current array's run to a video file on the server
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        children=[
+                            dbc.Button(
+                                "Export MP4",
+                                id="sort-export-mp4-button",
+                                color="info",
+                                className="btn-block mb-3",
+                                n_clicks=0
+                            ),
+                            dbc.Button(
+                                "Export GIF",
+                                id="sort-export-gif-button",
+                                color="info",
+                                className="btn-block mb-3",
+                                n_clicks=0
+                            ),
+                            html.Div(id="sort-export-status", className="mb-3"),
+                        ],
+                        className="text-center"
+                    ),
+                    width=12
+                ),
+                className="w-100 m-0 p-0"
+            ),
+            dcc.Store(id="sort-export-job"),
+            dcc.Interval(id="sort-export-interval", interval=1000, n_intervals=0, disabled=True),
+
+            # Which registered algorithm this page shows
+            dcc.Store(id="sort-algorithm", data=algorithm.name),
+
+            # Interval for Animation (paced by sort-speed, see playback_pace)
+            dcc.Interval(id="sort-interval", interval=SMALL_INPUT_INTERVAL, n_intervals=0, disabled=True),
+            dcc.Store(id="sort-canvas-frame"),
+
+            # Browser-side playback: the trace is sent once and assets/playback.js renders each frame
+            dcc.Interval(id="sort-client-interval", interval=client_pace(BASE_STEPS_PER_SECOND)[0], n_intervals=0, disabled=True),
+            dcc.Store(id="sort-client-trace"),
+            dcc.Store(id="sort-client-pace", data=client_pace(BASE_STEPS_PER_SECOND)[1]),
+
+            # Seek requests from the controls above, forwarded to the server in server playback mode
+            dcc.Store(id="sort-seek-store")
+        ],
+        className="p-0 m-0 w-100"
+    )
+
+
+# CSS classes of box idx: the shared box look plus the algorithm's state classes for the step
+def box_class(algorithm, idx, step=None):
+    state = algorithm.highlight(idx, step) if step is not None else ""
+    return f"sort-box {state}" if state else "sort-box"
+
+
+# Boxes for the array elements, highlighted for the step being shown
+def array_boxes(algorithm, values, step=None):
+    return [html.Div(str(value), className=box_class(algorithm, idx, step)) for idx, value in enumerate(values)]
+
+
+# Partial update from one frame to the next: only the text or classes of boxes
+# that changed are sent, so a tick costs a few props whatever the array size
+def patch_boxes(algorithm, old_values, old_step, values, step):
+    patched = Patch()
+    for idx, value in enumerate(values):
+        if value != old_values[idx]:
+            patched[idx]["props"]["children"] = str(value)
+        class_name = box_class(algorithm, idx, step)
+        if class_name != box_class(algorithm, idx, old_step):
+            patched[idx]["props"]["className"] = class_name
+    return patched
+
+
+# Frame interval (ms), steps per frame and effective steps per second for playing at
+# `steps_per_second`. A large trace (pass its length) is sped up to finish within
+# LARGE_INPUT_FRAMES frames at `frame_interval`, so long runs stay bounded in time.
+def playback_pace(steps_per_second, frame_interval, trace_length=0):
+    steps_per_second = max(steps_per_second or BASE_STEPS_PER_SECOND, trace_length * 1000 / (LARGE_INPUT_FRAMES * frame_interval))
+    interval = max(frame_interval, round(1000 / steps_per_second))
+    stride = max(1, round(steps_per_second * interval / 1000))
+    return interval, stride, steps_per_second
+
+
+# Steps to advance on a tick `elapsed` seconds after the last frame: one frame's
+# worth, or what fell due meanwhile when ticks come late (bounded)
+def steps_due(steps_per_second, stride, elapsed):
+    return min(max(stride, round(elapsed * steps_per_second)), MAX_CATCH_UP_FRAMES * stride)
+
+
+# Browser playback: its interval in ms, and the pace assets/playback.js advances by
+def client_pace(speed):
+    interval, stride, steps_per_second = playback_pace(speed, CLIENT_FRAME_INTERVAL)
+    return interval, {"stride": stride, "steps_per_second": steps_per_second, "max_catch_up": MAX_CATCH_UP_FRAMES}
+
+
+# Live counters panel at slider position p: the algorithm's totals over the steps up to
+# the one shown, plus the recursion depth where the algorithm has one (skipped while a
+# trace is still being built, as it is worked out from the whole trace)
+def counter_items(algorithm, trace, position, depth=True):
+    items = [(label, f"{value:,}") for label, value in algorithm.counts(trace, position + 1).items()]
+    levels = algorithm.depth_at(trace, min(position, len(trace) - 1)) if depth else None
+    if levels is not None:
+        items.append(("Recursion depth", f"{levels[0]:,} (max {levels[1]:,})"))
+    return items
+
+
+def counter_panel(items):
+    return [html.Div([html.Div(label, className="counter-label"), html.Div(value, className="counter-value")], className="counter")
+            for label, value in items]
+
+
+# Partial update of the panel, like patch_boxes: only the values that changed
+def patch_counters(old_items, items):
+    patched = Patch()
+    for idx, ((_, old_value), (_, value)) in enumerate(zip(old_items, items)):
+        if value != old_value:
+            patched[idx]["props"]["children"][1]["props"]["children"] = value
+    return patched
+
+
+# The same counters for browser playback, sent along with the trace: opcode weights per
+# counter label and the depth change points; assets/playback.js keeps the running totals
+def client_counters(algorithm, trace):
+    from sorting_algorithms.trace import OPCODES
+    counters = {label: {OPCODES[op]: weight for op, weight in weights.items()} for label, weights in algorithm.counters.items()}
+    depth = None
+    if algorithm.recursion_depth is not None:
+        algorithm.depth_at(trace, 0)  # Worked out once per trace
+        positions, depths, _ = trace.derived["recursion_depth"]
+        depth = {"positions": positions, "depths": depths}
+    return {"counters": counters, "depth": depth}
+
+
+# A finished run's totals for the complexity chart (a run cut off at the step limit is left out)
+def run_totals(algorithm, trace):
+    if trace.truncated:
+        return dash.no_update
+    return {"algorithm": algorithm.name, "n": len(trace.initial), "counts": algorithm.counts(trace, len(trace))}
+
+
+# Complexity chart: one marker per finished run (array size against the chosen counter),
+# with n² and n log₂ n drawn over the same range. A plain figure dict, so the page does
+# not import plotly.
+def complexity_figure(history, counter):
+    data = []
+    for name in dict.fromkeys(run["algorithm"] for run in history):
+        runs = [run for run in history if run["algorithm"] == name]
+        algorithm = get_algorithm(name)
+        data.append({
+            "type": "scatter", "mode": "markers", "name": algorithm.label if algorithm else name,
+            "x": [run["n"] for run in runs], "y": [run["counts"].get(counter) for run in runs],
+        })
+    low = max(2, min(run["n"] for run in history) / 2)
+    high = max(4, max(run["n"] for run in history) * 2)
+    sizes = [low * (high / low) ** (i / 49) for i in range(50)]
+    for name, curve in (("n²", lambda n: n * n), ("n log₂ n", lambda n: n * math.log2(n))):
+        data.append({"type": "scatter", "mode": "lines", "name": name, "x": sizes, "y": [curve(n) for n in sizes], "line": {"dash": "dash"}})
+    return {
+        "data": data,
+        "layout": {
+            "xaxis": {"type": "log", "title": {"text": "Array size n"}},
+            "yaxis": {"type": "log", "title": {"text": counter}},
+            "legend": {"orientation": "h"},
+            "margin": {"l": 60, "r": 20, "t": 20, "b": 50},
+            "height": 350,
+        },
+    }
+
+
+# Array contents and highlighted step shown at slider position p (the sorted array once p == len)
+def frame_at(trace, position):
+    if position < len(trace):
+        return trace.state_at(position + 1), trace.step(position)
+    return trace.state_at(len(trace)), None
+
+
+# Canvas frame for a large array: every element is sampled down to at most
+# CANVAS_COLUMNS bars, with the bars holding the step's indices highlighted
+def canvas_frame(values, step=None):
+    n = len(values)
+    columns = min(n, CANVAS_COLUMNS)
+    import numpy as np
+    sampled = np.asarray(values)[np.arange(columns) * n // columns]
+    highlight = []
+    if step is not None:
+        color = BAR_COLORS.get(step[0], "orange")
+        highlight = [[idx * columns // n, color] for idx in step[1:] if idx >= 0]
+    return {"values": sampled.tolist(), "max": int(max(sampled.max(), 1)), "highlight": highlight}
+
+
+# Boxes and canvas frame for the current view; exactly one of them is used
+def render_array(algorithm, values, step=None):
+    if len(values) > MAX_BOX_ELEMENTS:
+        return [], canvas_frame(values, step)
+    return array_boxes(algorithm, list(values), step), None
+
+
+# Callbacks for the Sorting Visualization Page
+def register_sorting_callbacks(app):
+    @app.callback(
+        [Output("sort-array-container", "children", allow_duplicate=True),
+         Output("sort-interval", "disabled", allow_duplicate=True),
+         Output("array-data-store", "data", allow_duplicate=True),
+         Output("sort-step-explanation", "children", allow_duplicate=True),
+         Output("sort-client-trace", "data"),
+         Output("sort-seek-slider", "value", allow_duplicate=True),
+         Output("sort-seek-slider", "max"),
+         Output("sort-canvas-frame", "data"),
+         Output("sort-interval", "interval"),
+         Output("sort-build-request", "data"),
+         Output("sort-counters", "children"),
+         Output("sort-run-totals", "data")],
+        [Input("sort-interval", "n_intervals"),
+         Input("sort-start-button", "n_clicks"),
+         Input("sort-restart-button", "n_clicks"),
+         Input("sort-seek-store", "data"),
+         Input("sort-cancel-button", "n_clicks")],
+        [State("sort-algorithm", "data"),
+         State("sort-interval", "disabled"),
+         State("array-data-store", "data"),
+         State("sort-playback-mode", "value"),
+         State("sort-speed", "value"),
+         State({"type": "sort-option", "name": ALL}, "value")],
+        prevent_initial_call="initial_duplicate"  # Render the input array on page load
+    )
+    def update_sorting_array(n_intervals, start_clicks, restart_clicks, seek_request, cancel_clicks, algorithm_name, interval_disabled, array_data, playback_mode, speed, option_values):
+        from sorting_algorithms.trace import serialize_trace
+        from sorting_algorithms.trace_cache import trace_cache, trace_key as make_trace_key
+        from sorting_algorithms.trace_store import trace_store
+
+        algorithm = get_algorithm(algorithm_name)
+        if algorithm is None:
+            raise PreventUpdate
+
+        ctx = dash.callback_context
+        button_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
+
+        # Initialize array data if None
+        if not has_input(array_data):
+            array_data = {"array_values": random_array()}
+
+        arr = input_values(array_data)
+        large = len(arr) > MAX_BOX_ELEMENTS
+        # Speed changes apply from the next tick; large runs are paced once their trace is known
+        interval, stride, steps_per_second = playback_pace(speed, SERVER_FRAME_INTERVAL)
+        if large:
+            interval = SERVER_FRAME_INTERVAL
+        current_step = array_data.get("current_step", 0)
+        slider_max = dash.no_update
+
+        # Cancel stops a background build (see build_trace below) and the playback waiting on it
+        if button_id == "sort-cancel-button":
+            if not cancel_clicks or not array_data.pop("building", False):
+                raise PreventUpdate
+            array_data.pop("trace_key", None)
+            return dash.no_update, True, array_data, "Step generation cancelled.", dash.no_update, dash.no_update, dash.no_update, dash.no_update, interval, dash.no_update, dash.no_update, dash.no_update
+
+        # The store's trace key names this page's run only if it is the key of this algorithm,
+        # array and options: it comes back from the browser, so it is checked, not trusted
+        # (the store is also shared by all algorithm pages)
+        trace_key = array_data.get("trace_key")
+        if trace_key and trace_key != make_trace_key(algorithm.name, arr, algorithm.resolve_options(array_data.get("options"))):
+            trace_key = None
+
+        # Page load (a reload, or back from another page): show the stored run where it was
+        # left if its trace is still at hand, else the input array. Nothing is built here.
+        if button_id is None:
+            trace = None
+            if trace_key and "position" in array_data and not array_data.get("building"):
+                trace = trace_cache.find(trace_key)
+            if trace is None:
+                boxes, frame = render_array(algorithm, arr)
+                return boxes, True, dash.no_update, DEFAULT_EXPLANATION, dash.no_update, 0, 0, frame, interval, dash.no_update, [], dash.no_update
+            position = min(array_data["position"], len(trace))
+            values, step = frame_at(trace, position)
+            if position < len(trace):
+                step_explanation = algorithm.describe(values, step)
+                if large:
+                    step_explanation = f"Step {position + 1:,} of {len(trace):,}: {step_explanation}"
+            elif trace.truncated:
+                step_explanation = f"Stopped after {len(trace):,} steps (trace step limit reached)."
+            else:
+                step_explanation = "Sorting completed!"
+            array_data["rendered"] = position
+            array_data.pop("shown_at", None)
+            boxes, frame = render_array(algorithm, values, step)
+            counters = counter_panel(counter_items(algorithm, trace, position))
+            return boxes, True, array_data, step_explanation, dash.no_update, position, len(trace), frame, interval, dash.no_update, counters, dash.no_update
+
+        # The store only carries the cache key; the trace itself stays on the server.
+        # While a background build runs, play the steps it has written so far.
+        trace = None
+        building = False
+        totals = dash.no_update  # Set when a run's full trace becomes available
+        if trace_key:
+            options = algorithm.resolve_options(array_data.get("options"))
+            if array_data.get("building"):
+                trace = trace_cache.find(trace_key)
+                if trace is None:
+                    trace, building = trace_store.load_partial(trace_key), True
+                else:
+                    array_data.pop("building")
+                    slider_max = len(trace)  # The full length, past the last partial one sent
+                    totals = run_totals(algorithm, trace)
+            if trace is None and not building:
+                array_data["trace_key"], trace = trace_cache.get_or_build(algorithm.name, arr, algorithm.steps, options=options)
+
+        # Handle button clicks (Restart shuffles a new random array of the same size)
+        if button_id == "sort-restart-button" and restart_clicks > 0:
+            array_data = reshuffled(array_data, len(arr))
+            arr = input_values(array_data)
+        if (button_id == "sort-start-button" and start_clicks > 0) or (button_id == "sort-restart-button" and restart_clicks > 0):
+            # Options are read once per run and kept with it, so a rebuild after eviction matches
+            options = algorithm.resolve_options({state["id"]["name"]: state.get("value") for state in ctx.states_list[-1]})
+            array_data["options"] = options
+            array_data["large"] = large  # Large traces always play from the server, frame by frame
+            array_data.pop("rendered", None)  # Next server frame is sent in full
+            array_data.pop("building", None)
+            array_data.pop("shown_at", None)
+            current_step = array_data["current_step"] = 0
+            interval_disabled = False
+
+            # Large arrays not built yet are generated in the background; playback starts
+            # with the first chunk of steps instead of holding this worker until the end
+            if trace_store.wants(arr):
+                array_data["trace_key"] = make_trace_key(algorithm.name, arr, options)
+                trace = trace_cache.find(array_data["trace_key"])
+                if trace is None:
+                    array_data["building"] = True
+                    request = {"algorithm": algorithm.name, "options": options, "array": array_recipe(array_data)}
+                    boxes, frame = render_array(algorithm, arr)
+                    return boxes, False, array_data, "Generating steps...", dash.no_update, 0, 0, frame, interval, request, [], dash.no_update
+            else:
+                array_data["trace_key"], trace = trace_cache.get_or_build(algorithm.name, arr, algorithm.steps, options=options)
+            slider_max = len(trace)
+            totals = run_totals(algorithm, trace)
+
+            # Browser playback: ship the whole trace once and leave the server interval off
+            # (only for algorithms whose rules assets/playback.js has; the rest tick here)
+            if "client" in (playback_mode or []) and not large and algorithm.browser_playback:
+                payload = {**serialize_trace(trace, compress=False), **client_counters(algorithm, trace)}
+                return dash.no_update, True, array_data, dash.no_update, payload, 0, slider_max, None, interval, dash.no_update, dash.no_update, totals
+        elif building and trace is None and not interval_disabled:
+            # The build has not written its first chunk yet
+            return dash.no_update, False, array_data, "Generating steps...", dash.no_update, dash.no_update, dash.no_update, dash.no_update, interval, dash.no_update, dash.no_update, dash.no_update
+        elif trace is None:
+            # No run of this algorithm (the store holds another page's trace): show the input array
+            boxes, frame = render_array(algorithm, arr)
+            return boxes, True, dash.no_update, DEFAULT_EXPLANATION, dash.no_update, 0, 0, frame, interval, dash.no_update, [], dash.no_update
+
+        if building:
+            slider_max = len(trace)  # Grows as the build goes on
+        if large:
+            interval, stride, steps_per_second = playback_pace(speed, SERVER_FRAME_INTERVAL, len(trace))
+
+        # Seeking (slider, step back, jump to end) moves the cursor; playback keeps its state
+        seeking = button_id == "sort-seek-store" and seek_request is not None
+        if seeking:
+            current_step = max(0, min(int(seek_request["step"]), len(trace)))
+        elif interval_disabled:
+            raise PreventUpdate  # Stale tick after playback stopped
+        elif button_id == "sort-interval" and "shown_at" in array_data:
+            # Ticks falling behind (slow renders, a busy worker) skip the frames due meanwhile
+            due = steps_due(steps_per_second, stride, time.time() - array_data["shown_at"])
+            current_step = max(current_step, array_data["position"] + due)
+
+        # Step through sorting animation
+        if current_step < len(trace):
+            values, step = frame_at(trace, current_step)  # Array after this step
+            step_explanation = algorithm.describe(values, step)
+            if large:
+                total = f"{len(trace):,}+" if building else f"{len(trace):,}"
+                step_explanation = f"Step {current_step + 1:,} of {total}: {step_explanation}"
+            array_data["current_step"] = current_step + stride  # Move to next frame
+            position = current_step
+        elif building:
+            # Caught up with the build: hold the last frame until more steps are written
+            return dash.no_update, False, array_data, f"Generating steps... ({len(trace):,} so far)", dash.no_update, dash.no_update, slider_max, dash.no_update, interval, dash.no_update, dash.no_update, dash.no_update
+        else:
+            values, step = frame_at(trace, len(trace))
+            interval_disabled = True
+            if trace.truncated:
+                step_explanation = f"Stopped after {len(trace):,} steps (trace step limit reached)."
+            else:
+                step_explanation = "Sorting completed!"
+            array_data["current_step"] = position = len(trace)
+        array_data["position"] = position  # Slider position the client last saw
+        array_data["shown_at"] = time.time()
+        log_sampled(logger, "frame algorithm=%s trigger=%s position=%d steps=%d", algorithm.name, button_id, position, len(trace))
+
+        # Interval ticks on boxes patch the frame this server rendered last; clicks and seeks
+        # (or a frame drawn in the browser since) get a full render
+        rendered = array_data.get("rendered")
+        counters = counter_items(algorithm, trace, position, depth=not building)
+        if button_id == "sort-interval" and not large and rendered is not None:
+            boxes, frame = patch_boxes(algorithm, *frame_at(trace, rendered), values, step), None
+            counters = patch_counters(counter_items(algorithm, trace, rendered), counters)
+        else:
+            boxes, frame = render_array(algorithm, values, step)
+            counters = counter_panel(counters)
+        array_data["rendered"] = position
+
+        return boxes, interval_disabled, array_data, step_explanation, dash.no_update, position, slider_max, frame, interval, dash.no_update, counters, totals
+
+    # Trace generation for large arrays, run by the background callback manager (app.py) in
+    # its own process. It streams the trace into the trace store, which playback above reads
+    # from as it grows, and reports progress here; Cancel stops the process.
+    @app.callback(
+        Output("sort-build-done", "data"),
+        Input("sort-build-request", "data"),
+        background=True,
+        progress=[Output("sort-build-progress", "label")],
+        running=[(Output("sort-build-status", "style"), {"display": "block"}, {"display": "none"}),
+                 (Output("sort-cancel-button", "disabled"), False, True)],
+        cancel=[Input("sort-cancel-button", "n_clicks")],
+        interval=500,
+        prevent_initial_call=True
+    )
+    def build_trace(set_progress, request):
+        if not request:
+            raise PreventUpdate
+        algorithm = get_algorithm(request["algorithm"])
+        arr = input_values(request["array"])
+        set_progress((f"Generating steps for {len(arr):,} elements...",))
+
+        def report(written):
+            set_progress((f"{written:,} steps generated",))
+
+        key, trace = store_trace(algorithm, arr, request["options"], progress=report)
+        logger.info("background trace built key=%s steps=%d", key, len(trace))
+        return key
+
+    # Browser playback pace for the selected speed (the server paces its own ticks)
+    @app.callback(
+        [Output("sort-client-interval", "interval"),
+         Output("sort-client-pace", "data")],
+        Input("sort-speed", "value"),
+        prevent_initial_call=True  # The layout starts at the default speed
+    )
+    def update_client_pace(speed):
+        return client_pace(speed)
+
+    # Browser-side playback: each client interval tick renders one frame locally. The same
+    # function turns slider/step-back/jump-to-end input into seek requests in server mode.
+    app.clientside_callback(
+        ClientsideFunction(namespace="playback", function_name="tick"),
+        [Output("sort-array-container", "children", allow_duplicate=True),
+         Output("sort-step-explanation", "children", allow_duplicate=True),
+         Output("sort-client-interval", "disabled"),
+         Output("sort-seek-slider", "value", allow_duplicate=True),
+         Output("sort-seek-store", "data"),
+         Output("sort-counters", "children", allow_duplicate=True)],
+        [Input("sort-client-interval", "n_intervals"),
+         Input("sort-client-trace", "data"),
+         Input("sort-seek-slider", "value"),
+         Input("sort-step-back-button", "n_clicks"),
+         Input("sort-jump-end-button", "n_clicks")],
+        [State("sort-playback-mode", "value"),
+         State("array-data-store", "data"),
+         State("sort-seek-slider", "max"),
+         State("sort-client-pace", "data")],
+        prevent_initial_call=True
+    )
+
+    # Complexity chart: every finished run joins the session's history
+    @app.callback(
+        Output("sort-run-history", "data"),
+        Input("sort-run-totals", "data"),
+        State("sort-run-history", "data"),
+        prevent_initial_call=True
+    )
+    def record_run(totals, history):
+        if not totals:
+            raise PreventUpdate
+        return (history or [])[-(MAX_RUN_HISTORY - 1):] + [totals]
+
+    @app.callback(
+        [Output("sort-complexity-graph", "figure"),
+         Output("sort-complexity", "style")],
+        [Input("sort-run-history", "data"),
+         Input("sort-complexity-counter", "value")]
+    )
+    def update_complexity_chart(history, counter):
+        if not history:
+            return dash.no_update, {"display": "none"}
+        return complexity_figure(history, counter), {"display": "block"}
+
+    # Draw the large-array bar chart whenever the server sends a new frame
+    app.clientside_callback(
+        ClientsideFunction(namespace="playback", function_name="draw"),
+        Output("sort-canvas", "style"),
+        Input("sort-canvas-frame", "data")
+    )
+
+    # Export: encoding runs in its own process; this page polls the job's status file
+    @app.callback(
+        [Output("sort-export-job", "data"),
+         Output("sort-export-interval", "disabled"),
+         Output("sort-export-status", "children")],
+        [Input("sort-export-mp4-button", "n_clicks"),
+         Input("sort-export-gif-button", "n_clicks")],
+        [State("sort-algorithm", "data"),
+         State("array-data-store", "data"),
+         State("sort-export-job", "data"),
+         State({"type": "sort-option", "name": ALL}, "value")],
+        prevent_initial_call=True
+    )
+    def start_export(mp4_clicks, gif_clicks, algorithm_name, array_data, current_job, option_values):
+        from sorting_algorithms.export import ExportBusy, job_active, start_export_job
+        algorithm = get_algorithm(algorithm_name)
+        if algorithm is None or not has_input(array_data):
+            raise PreventUpdate
+        if current_job and job_active(current_job):
+            return dash.no_update, False, "An export is already running for this page."
+        ctx = dash.callback_context
+        fmt = "gif" if ctx.triggered[0]["prop_id"].startswith("sort-export-gif-button") else "mp4"
+        # The run being shown if it is this page's, otherwise the options picked now
+        if (array_data.get("trace_key") or "").split(":")[0] == algorithm.name:
+            options = algorithm.resolve_options(array_data.get("options"))
+        else:
+            options = algorithm.resolve_options({state["id"]["name"]: state.get("value") for state in ctx.states_list[-1]})
+        try:
+            job_id = start_export_job(algorithm.name, input_values(array_data), options, fmt)
+        except ExportBusy as exc:
+            logger.warning("export refused algorithm=%s: %s", algorithm.name, exc)
+            return dash.no_update, True, f"The server is busy: {exc}. Try again shortly."
+        logger.info("export started job=%s algorithm=%s format=%s", job_id, algorithm.name, fmt)
+        return job_id, False, f"Exporting {fmt.upper()}..."
+
+    @app.callback(
+        [Output("sort-export-status", "children", allow_duplicate=True),
+         Output("sort-export-interval", "disabled", allow_duplicate=True)],
+        Input("sort-export-interval", "n_intervals"),
+        State("sort-export-job", "data"),
+        prevent_initial_call=True
+    )
+    def poll_export(n_intervals, job_id):
+        from sorting_algorithms.export import job_status
+        status = job_status(job_id) if job_id else None
+        if status is None:
+            return "Export failed: job not found.", True
+        if status["state"] == "done":
+            return html.A("Download export", href=f"/exports/{status['filename']}", download=status["filename"]), True
+        if status["state"] == "failed":
+            return f"Export failed: {status['error']}", True
+        if status["state"] == "running":
+            return dbc.Progress(value=100 * status["done"] / status["total"], label=f"{status['done']:,} / {status['total']:,} frames"), False
+        return "Export queued...", False
+
+    @app.server.route("/exports/<filename>")
+    def serve_export(filename):
+        from sorting_algorithms.export import EXPORT_DIR
+        if not filename.endswith((".mp4", ".gif")):
+            abort(404)
+        return send_from_directory(EXPORT_DIR, filename, as_attachment=True)
@@ -0,0 +1,79 @@
+# payload_size.py
+# Per-frame JSON size of the sorting page's box renderer, checked against budgets:
+#   python payload_size.py          (exits 1 if a budget is exceeded)
+# Run it after touching pages/sorting.py, the highlight rules or assets/styles.css.
+import sys
+from dash import html
+from plotly.io.json import to_json_plotly
+from pages.sorting import MAX_BOX_ELEMENTS, array_boxes, frame_at, patch_boxes
+from sorting_algorithms.registry import algorithm_names, get_algorithm
+from sorting_algorithms.trace import Trace
+
+# Budgets in bytes of JSON, as Dash serializes callback outputs
+FULL_FRAME_BYTES_PER_BOX = 128
+PATCH_BYTES_PER_TICK = 640
+
+# The shared part of the inline style every box used to carry, for comparison
+INLINE_BOX_STYLE = {
+    "width": "100px",
+    "height": "100px",
+    "border": "3px solid #000",
+    "borderRadius": "50%",
+    "display": "flex",
+    "alignItems": "center",
+    "justifyContent": "center",
+    "fontSize": "20px",
+    "margin": "10px",
+    "transition": "transform 1s ease-in-out",
+}
+
+SAMPLE_ARRAY = [55, 15, 80, 35, 70, 10, 95, 45, 25, 60, 90, 20, 65, 40, 50][:MAX_BOX_ELEMENTS]
+
+
+def json_size(value):
+    return len(to_json_plotly(value))
+
+
+def measure(name):
+    """Largest full frame, average and largest patch tick, and the inline-style equivalent."""
+    algorithm = get_algorithm(name)
+    arr = list(SAMPLE_ARRAY)
+    trace = Trace.from_steps(name, arr, algorithm.steps(list(arr)))
+    full, patches, inline = [], [], []
+    previous = None
+    for position in range(len(trace) + 1):
+        values, step = frame_at(trace, position)
+        values = values.tolist()
+        full.append(json_size(array_boxes(algorithm, values, step)))
+        inline.append(json_size([html.Div(str(value), style=INLINE_BOX_STYLE) for value in values]))
+        if previous is not None:
+            patches.append(json_size(patch_boxes(algorithm, *previous, values, step)))
+        previous = values, step
+    return {
+        "algorithm": name,
+        "frames": len(full),
+        "full_max": max(full),
+        "inline_max": max(inline),
+        "patch_avg": sum(patches) / len(patches),
+        "patch_max": max(patches),
+    }
+
+
+def main():
+    failures = []
+    print(f"{'algorithm':<16}{'frames':>8}{'inline':>9}{'full':>7}{'shrink':>8}{'patch avg':>11}{'patch max':>11}")
+    for name in algorithm_names():
+        r = measure(name)
+        print(f"{name:<16}{r['frames']:>8}{r['inline_max']:>9}{r['full_max']:>7}{1 - r['full_max'] / r['inline_max']:>8.0%}"
+              f"{r['patch_avg']:>11.0f}{r['patch_max']:>11}")
+        if r["full_max"] > FULL_FRAME_BYTES_PER_BOX * len(SAMPLE_ARRAY):
+            failures.append(f"{name}: full frame {r['full_max']} B > {FULL_FRAME_BYTES_PER_BOX} B per box")
+        if r["patch_avg"] > PATCH_BYTES_PER_TICK:
+            failures.append(f"{name}: average patch {r['patch_avg']:.0f} B > {PATCH_BYTES_PER_TICK} B")
+    for failure in failures:
+        print("FAIL", failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# profiling.py
+# Leveled logging and opt-in profiling for the Dash callbacks.
+#
+#   LOG_LEVEL=DEBUG               log level for the app's loggers (default WARNING)
+#   LOG_SAMPLE_RATE=0.01          fraction of per-tick debug lines actually written
+#   PROFILE_CALLBACKS=all         run these callbacks (comma separated names, or "all")
+#                                 under cProfile and tracemalloc
+#   PROFILE_QUERY_FLAG=1          also profile when the page URL has ?profile=<name or all>
+#   PROFILE_SAMPLE_RATE=0.1       fraction of matching calls that are profiled
+#   PROFILE_DIR=profiles          write each profile there (.prof for pstats/snakeviz,
+#                                 .txt summary); the latest ones are also listed at /diagnostics
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+from flask import Response, has_request_context, request
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 0.01))
+PROFILE_CALLBACKS = {name.strip() for name in os.environ.get("PROFILE_CALLBACKS", "").split(",") if name.strip()}
+PROFILE_QUERY_FLAG = os.environ.get("PROFILE_QUERY_FLAG", "") not in ("", "0", "false")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 1.0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+
+# Profiles kept in memory for the /diagnostics page
+RECENT_PROFILES = 20
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(level=LOG_LEVEL):
+    """Send the app's log records to stderr as 'time LEVEL logger message' lines."""
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s %(message)s", level=logging.WARNING)
+    for name in ("__main__", "app", "api", "pages", "sorting_algorithms", "metrics", __name__):
+        logging.getLogger(name).setLevel(level)
+
+
+def sampled(rate=LOG_SAMPLE_RATE):
+    return rate >= 1 or random.random() < rate
+
+
+def log_sampled(log, msg, *args, rate=LOG_SAMPLE_RATE):
+    """logger.debug for hot paths: only a `rate` fraction of the calls format and write anything."""
+    if log.isEnabledFor(logging.DEBUG) and sampled(rate):
+        log.debug(msg, *args)
+
+
+class CallbackProfiler:
+    """Runs selected callbacks under cProfile and tracemalloc and keeps the results."""
+
+    def __init__(self, callbacks=PROFILE_CALLBACKS, query_flag=PROFILE_QUERY_FLAG, sample_rate=PROFILE_SAMPLE_RATE, directory=PROFILE_DIR):
+        self.callbacks = set(callbacks)
+        self.query_flag = query_flag
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.recent = deque(maxlen=RECENT_PROFILES)
+        # tracemalloc is process wide, so only one call is traced at a time
+        self._busy = threading.Lock()
+
+    def wanted(self, name):
+        selected = self.callbacks
+        if self.query_flag and has_request_context() and request.referrer:
+            # Dash posts callbacks from the page, so the page URL arrives as the Referer
+            selected = selected | set(parse_qs(urlparse(request.referrer).query).get("profile", []))
+        return ("all" in selected or name in selected) and sampled(self.sample_rate)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            if not self.wanted(name) or not self._busy.acquire(blocking=False):
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            tracing = not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if tracing:
+                    tracemalloc.stop()
+                self._busy.release()
+                self.record(name, elapsed, peak, profile, snapshot)
+
+        return profiled
+
+    def record(self, name, elapsed, peak, profile, snapshot):
+        stats_text = io.StringIO()
+        pstats.Stats(profile, stream=stats_text).sort_stats("cumulative").print_stats(25)
+        allocations = "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:15])
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        summary = (
+            f"{name} at {stamp}: {elapsed * 1000:.1f} ms, peak traced memory {peak / 1024:.1f} KiB\n\n"
+            f"Top allocations:\n{allocations}\n\n{stats_text.getvalue()}"
+        )
+        self.recent.appendleft(summary)
+        logger.info("profiled callback=%s ms=%.1f peak_kib=%.1f", name, elapsed * 1000, peak / 1024)
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{stamp}-{name}")
+            profile.dump_stats(path + ".prof")
+            with open(path + ".txt", "w") as f:
+                f.write(summary)
+
+
+def install_profiler(app, profiler=None):
+    """Wrap every registered server callback of `app` and serve recent profiles at /diagnostics."""
+    profiler = profiler or CallbackProfiler()
+    for entry in app.callback_map.values():
+        func = entry.get("callback")
+        if func is not None:  # Clientside callbacks run in the browser
+            entry["callback"] = profiler.wrap(func.__name__, func)
+
+    @app.server.route("/diagnostics")
+    def diagnostics():
+        if not profiler.recent:
+            text = "No profiles captured. Set PROFILE_CALLBACKS (or PROFILE_QUERY_FLAG and ?profile=) to enable.\n"
+        else:
+            text = ("\n" + "=" * 100 + "\n\n").join(profiler.recent)
+        return Response(text, mimetype="text/plain")
+
+    return profiler
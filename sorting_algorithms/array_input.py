@@ -0,0 +1,74 @@
+# array_input.py
+# Parsing of pasted or uploaded arrays for the input page. Text is handled as
+# bytes, a chunk at a time, and every check is a NumPy operation over the
+# chunk; no per-value Python strings are made.
+import base64
+import numpy as np
+
+# How many values and which values are accepted
+BULK_INPUT_MIN = 2
+BULK_VALUE_MIN = 0
+BULK_VALUE_MAX = 1_000_000
+
+# Bytes of pasted or uploaded text parsed at a time
+PARSE_CHUNK_BYTES = 1 << 20
+
+_SEPARATORS = bytes.maketrans(b",;\t\r\n", b"     ")
+
+
+def text_chunks(text):
+    for start in range(0, len(text), PARSE_CHUNK_BYTES):
+        yield text[start:start + PARSE_CHUNK_BYTES].encode()
+
+
+def upload_chunks(contents):
+    # dcc.Upload contents are a data URL: "data:text/csv;base64,<payload>"
+    payload = contents.partition(",")[2]
+    step = PARSE_CHUNK_BYTES // 3 * 4  # Whole base64 quanta per chunk
+    for start in range(0, len(payload), step):
+        chunk = base64.b64decode(payload[start:start + step])
+        yield chunk.removeprefix(b"\xef\xbb\xbf") if start == 0 else chunk  # Byte order mark from spreadsheet exports
+
+
+def _parse_chunk(data, parsed):
+    raw = np.frombuffer(data, dtype=np.uint8)
+    digit = (raw >= ord("0")) & (raw <= ord("9"))
+    space = raw == ord(" ")
+    follows_space = np.concatenate(([True], space[:-1]))
+    # Every token must be an optionally signed run of digits
+    sign = ((raw == ord("-")) | (raw == ord("+"))) & follows_space & np.concatenate((digit[1:], [False]))
+    bad = ~(digit | space | sign)
+    if bad.any():
+        entry = parsed + np.count_nonzero((~space & follows_space)[:np.argmax(bad) + 1])
+        raise ValueError(f"Entry {entry:,} is not a whole number.")
+    if space.all():
+        return np.empty(0, dtype=np.int64)
+    return np.fromstring(data, dtype=np.int64, sep=" ")
+
+
+def parse_values(chunks, max_values=None):
+    """Integers separated by commas, semicolons or whitespace, from an iterable of byte chunks."""
+    parts = []
+    parsed = 0
+    carry = b""
+    for chunk in chunks:
+        data = carry + chunk.translate(_SEPARATORS)
+        cut = data.rfind(b" ") + 1  # A value split across chunks waits for the next one
+        data, carry = data[:cut], data[cut:]
+        parts.append(_parse_chunk(data, parsed))
+        parsed += len(parts[-1])
+        if max_values is not None and parsed > max_values:
+            raise ValueError(f"Too many values: at most {max_values:,} are allowed.")
+    parts.append(_parse_chunk(carry, parsed))
+    return np.concatenate(parts)
+
+
+def validate_values(values, max_values):
+    """Return `values` if their count and range are acceptable, else raise ValueError saying why."""
+    if len(values) < BULK_INPUT_MIN or len(values) > max_values:
+        raise ValueError(f"Enter between {BULK_INPUT_MIN} and {max_values:,} values (got {len(values):,}).")
+    out_of_range = (values < BULK_VALUE_MIN) | (values > BULK_VALUE_MAX)
+    if out_of_range.any():
+        entry = int(np.argmax(out_of_range))
+        raise ValueError(f"Entry {entry + 1:,} ({values[entry]}) is outside {BULK_VALUE_MIN} to {BULK_VALUE_MAX:,}.")
+    return values
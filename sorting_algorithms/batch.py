@@ -0,0 +1,147 @@
+# batch.py
+# Build many traces at once, spread over a process pool, into one .npz file:
+#   python -m sorting_algorithms.batch --algorithms quick-sort insertion-sort \
+#       --generate 100:random:20 --generate 1000:nearly-sorted:5 --output lesson.npz
+#   python -m sorting_algorithms.batch --arrays arrays.txt --output lesson.npz
+# Arrays files hold one array per line (comma or space separated) or a JSON list of lists.
+# Read the result back with load_traces().
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sorting_algorithms.benchmark import parse_options
+from sorting_algorithms.distributions import DISTRIBUTIONS, generate_array
+from sorting_algorithms.registry import algorithm_names, get_algorithm
+from sorting_algorithms.trace import Trace
+from sorting_algorithms.trace_cache import TRACE_MAX_STEPS
+
+# One row per trace in the file's "index" entry; traces are stored as
+# initial_<row> and steps_<row> (STEP_DTYPE), so the file loads without pickle
+INDEX_DTYPE = np.dtype([
+    ("algorithm", "U32"),
+    ("options", "U128"),
+    ("source", np.int32),  # Position of the input array in the arrays file or generator spec
+    ("length", np.int64),
+    ("truncated", np.bool_),
+])
+
+# Jobs per worker per shard handed out at once: fewer round trips, still balanced
+SHARDS_PER_WORKER = 4
+
+# Shards submitted ahead of the one being written, per worker
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
+
+def read_arrays(path):
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return [[int(v) for v in arr] for arr in json.loads(text)]
+    return [[int(v) for v in line.replace(",", " ").split()] for line in text.splitlines() if line.strip()]
+
+
+def generated_arrays(specs, seed=0):
+    # 'SIZE:DISTRIBUTION[:COUNT]', e.g. '1000:nearly-sorted:5'; each array gets its own seed
+    arrays = []
+    for spec in specs:
+        size, distribution, count = (spec.split(":") + ["1"])[:3]
+        for _ in range(int(count)):
+            arrays.append(generate_array(int(size), distribution, seed + len(arrays)))
+    return arrays
+
+
+def _build(job):
+    name, options, arr, max_steps = job
+    trace = Trace.from_steps(name, arr, get_algorithm(name).steps(list(arr), **options), max_steps=max_steps)
+    return trace.initial, trace.steps, trace.truncated
+
+
+def _build_shard(jobs):
+    return [_build(job) for job in jobs]
+
+
+def _write_array(archive, name, arr):
+    # Same member layout as np.savez, written one entry at a time
+    with archive.open(name + ".npy", "w", force_zip64=True) as f:
+        np.lib.format.write_array(f, arr, allow_pickle=False)
+
+
+def build_batch(algorithms, arrays, path, options=None, max_steps=TRACE_MAX_STEPS, workers=None, compress=False):
+    """Trace every array with every algorithm into `path`; returns the index rows.
+
+    Traces are written in order as they come back from the workers, and
+    only a few shards per worker are submitted ahead of the one being
+    written, so at most those shards' traces are held in memory.
+    """
+    jobs, index = [], []
+    for name in algorithms:
+        resolved = get_algorithm(name).resolve_options(options)
+        for source, arr in enumerate(arrays):
+            jobs.append((name, resolved, arr, max_steps))
+            index.append((name, ",".join(f"{key}={value}" for key, value in resolved.items()), source))
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * SHARDS_PER_WORKER))
+    shards = [jobs[start:start + chunksize] for start in range(0, len(jobs), chunksize)]
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    rows = []
+    with zipfile.ZipFile(path, "w", compression, allowZip64=True) as archive, ProcessPoolExecutor(max_workers=workers) as pool:
+        # A bounded window (pool.map would submit every shard up front, and finished
+        # shards would pile up behind a slow one)
+        pending = deque()
+        next_shard = 0
+        while pending or next_shard < len(shards):
+            while next_shard < len(shards) and len(pending) < SHARDS_IN_FLIGHT_PER_WORKER * workers:
+                pending.append(pool.submit(_build_shard, shards[next_shard]))
+                next_shard += 1
+            for initial, steps, truncated in pending.popleft().result():
+                row = len(rows)
+                _write_array(archive, f"initial_{row}", initial)
+                _write_array(archive, f"steps_{row}", steps)
+                rows.append(index[row] + (len(steps), truncated))
+        _write_array(archive, "index", np.array(rows, dtype=INDEX_DTYPE))
+    return rows
+
+
+def load_traces(path):
+    """Yield (index row as a dict, Trace) for every trace in a batch file."""
+    with np.load(path) as data:
+        for row, entry in enumerate(data["index"]):
+            entry = {field: entry[field].item() for field in INDEX_DTYPE.names}
+            yield entry, Trace(entry["algorithm"], data[f"initial_{row}"], data[f"steps_{row}"], truncated=entry["truncated"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build sorting traces in parallel into one .npz file.")
+    parser.add_argument("--algorithms", nargs="+", default=algorithm_names(), choices=algorithm_names())
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--arrays", help="file with one array per line, or a JSON list of arrays")
+    source.add_argument("--generate", action="append", metavar="SIZE:DISTRIBUTION[:COUNT]",
+                        help=f"generated input arrays, distribution one of {', '.join(DISTRIBUTIONS)}")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first generated array")
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                        help="algorithm option such as pivot=median3 (ignored by algorithms without it)")
+    parser.add_argument("--max-steps", type=int, default=TRACE_MAX_STEPS, help="stop traces at this many steps")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--compress", action="store_true", help="deflate the file (smaller, slower to load)")
+    parser.add_argument("--output", required=True, help="output .npz file")
+    args = parser.parse_args(argv)
+
+    arrays = read_arrays(args.arrays) if args.arrays else generated_arrays(args.generate, args.seed)
+    start = time.perf_counter()
+    rows = build_batch(args.algorithms, arrays, args.output, parse_options(args.option), args.max_steps, args.workers, args.compress)
+    seconds = time.perf_counter() - start
+    steps = sum(row[3] for row in rows)
+    truncated = sum(row[4] for row in rows)
+    print(f"Wrote {len(rows)} traces ({steps:,} steps{f', {truncated} truncated' if truncated else ''}) to {args.output} "
+          f"in {seconds:.2f}s, {steps / seconds:,.0f} steps/s", file=sys.stderr)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmark.py
+# Headless benchmark of the step generators and trace format:
+#   python -m sorting_algorithms.benchmark --json results.json --csv results.csv
+import argparse
+import csv
+import json
+import sys
+import time
+import tracemalloc
+from sorting_algorithms.distributions import DISTRIBUTIONS, generate_array
+from sorting_algorithms.registry import algorithm_names, get_algorithm
+from sorting_algorithms.trace import Trace, serialize_trace
+from sorting_algorithms.trace_cache import TRACE_MAX_STEPS
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+FIELDS = [
+    "algorithm", "options", "distribution", "size", "seconds", "comparisons", "swaps", "writes",
+    "trace_length", "truncated", "trace_bytes", "payload_bytes", "peak_memory_bytes",
+]
+
+# Count columns and the registry counters they report, so the benchmark agrees with
+# the page counters and race stats (see SortingAlgorithm.counters)
+COUNTER_FIELDS = {"comparisons": "Comparisons", "swaps": "Swaps", "writes": "Array writes"}
+
+
+def build_trace(algorithm, arr, options, max_steps):
+    return Trace.from_steps(algorithm.name, arr, algorithm.steps(list(arr), **options), max_steps=max_steps)
+
+
+def run_case(algorithm, size, distribution, options=None, seed=0, max_steps=TRACE_MAX_STEPS, repeat=1, memory=True):
+    """Build one trace and return its measurements as a flat dict (see FIELDS)."""
+    options = algorithm.resolve_options(options)
+    arr = generate_array(size, distribution, seed)
+
+    # Best of `repeat` runs, timed without tracemalloc (which slows allocation down)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        trace = build_trace(algorithm, arr, options, max_steps)
+        seconds.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        build_trace(algorithm, arr, options, max_steps)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    counts = algorithm.counts(trace, len(trace))
+    return {
+        "algorithm": algorithm.name,
+        "options": ",".join(f"{name}={value}" for name, value in options.items()),
+        "distribution": distribution,
+        "size": size,
+        "seconds": min(seconds),
+        **{field: int(counts.get(label, 0)) for field, label in COUNTER_FIELDS.items()},
+        "trace_length": len(trace),
+        "truncated": trace.truncated,
+        "trace_bytes": int(trace.steps.nbytes),
+        "payload_bytes": len(serialize_trace(trace)["steps"]),
+        "peak_memory_bytes": peak,
+    }
+
+
+def summary_table(results):
+    header = ["algorithm", "distribution", "size", "time (s)", "compares", "swaps", "writes", "steps", "peak MiB"]
+    rows = [header]
+    for r in results:
+        peak = "-" if r["peak_memory_bytes"] is None else f"{r['peak_memory_bytes'] / 2 ** 20:.1f}"
+        rows.append([
+            r["algorithm"] + (f" ({r['options']})" if r["options"] else ""),
+            r["distribution"],
+            f"{r['size']:,}",
+            f"{r['seconds']:.3f}",
+            f"{r['comparisons']:,}",
+            f"{r['swaps']:,}",
+            f"{r['writes']:,}",
+            f"{r['trace_length']:,}" + ("+" if r["truncated"] else ""),  # '+': stopped at the step limit
+            peak,
+        ])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(w) if i < 2 else cell.rjust(w) for i, (cell, w) in enumerate(zip(row, widths))) for row in rows]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def parse_options(pairs):
+    # ['pivot=median3', 'fallback=heap'] -> {'pivot': 'median3', 'fallback': 'heap'}
+    options = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        options[name] = value
+    return options
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sorting step generators across sizes and input distributions.")
+    parser.add_argument("--algorithms", nargs="+", default=algorithm_names(), choices=algorithm_names())
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                        help="algorithm option such as pivot=median3 (ignored by algorithms without it)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="time the best of this many runs")
+    parser.add_argument("--max-steps", type=int, default=TRACE_MAX_STEPS, help="stop traces at this many steps")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--csv", help="write results to this CSV file")
+    args = parser.parse_args(argv)
+
+    options = parse_options(args.option)
+    results = []
+    for name in args.algorithms:
+        algorithm = get_algorithm(name)
+        for distribution in args.distributions:
+            for size in args.sizes:
+                result = run_case(algorithm, size, distribution, options, args.seed, args.max_steps, args.repeat, not args.no_memory)
+                print(f"{name} {distribution} {size}: {result['seconds']:.3f}s, {result['trace_length']:,} steps", file=sys.stderr)
+                results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    print(summary_table(results))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# distributions.py
+
+# Input shapes for large arrays (value -> label shown in the dropdown)
+DISTRIBUTIONS = {
+    "random": "Random",
+    "sorted": "Sorted",
+    "reversed": "Reversed",
+    "few-unique": "Few unique values",
+    "nearly-sorted": "Nearly sorted",
+    "sawtooth": "Sawtooth",
+}
+
+
+def generate_array(size, distribution="random", seed=None):
+    """Return `size` integers in 1..size laid out as `distribution`, reproducible from `seed`."""
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    import numpy as np  # Not at the top: the input page imports DISTRIBUTIONS at startup
+
+    rng = np.random.default_rng(seed)
+    if distribution == "random":
+        values = rng.integers(1, size + 1, size)
+    elif distribution == "sorted":
+        values = np.sort(rng.integers(1, size + 1, size))
+    elif distribution == "reversed":
+        values = np.sort(rng.integers(1, size + 1, size))[::-1]
+    elif distribution == "few-unique":
+        # A handful of distinct values spread over the full range
+        levels = np.linspace(1, size, num=min(size, 8), dtype=np.int64)
+        values = rng.choice(levels, size)
+    elif distribution == "nearly-sorted":
+        # Sorted, then about 1% of the elements swapped with a random partner
+        values = np.sort(rng.integers(1, size + 1, size))
+        swaps = max(1, size // 100)
+        i, j = rng.integers(0, size, swaps), rng.integers(0, size, swaps)
+        values[i], values[j] = values[j], values[i]  # Fancy indexing copies, so this is a true swap
+    else:
+        # Eight ascending runs of equal length
+        tooth = max(1, size // 8)
+        values = (np.arange(size) % tooth + 1) * (size // tooth)
+
+    return values.astype(np.int64).tolist()
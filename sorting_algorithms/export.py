@@ -0,0 +1,281 @@
+# export.py
+# Render a sort trace to MP4 or GIF. Frames are rasterized with NumPy in
+# chunks across a process pool and appended to the encoder as they arrive,
+# so only a bounded window of frames is ever held in memory:
+#   python -m sorting_algorithms.export quick-sort --size 2000 --output quick.mp4
+#
+# Jobs started from the web page are limited and cleaned up:
+#   EXPORT_MAX_JOBS=2                 exports encoding at once; more are refused
+#   EXPORT_MAX_BYTES=1073741824       finished exports kept, oldest deleted first
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sorting_algorithms.benchmark import parse_options
+from sorting_algorithms.distributions import DISTRIBUTIONS, generate_array
+from sorting_algorithms.registry import algorithm_names, get_algorithm
+from sorting_algorithms.trace import OPNAMES, Trace, deserialize_trace, serialize_trace
+from sorting_algorithms.trace_cache import TRACE_MAX_STEPS
+
+EXPORT_FORMATS = ("mp4", "gif")
+EXPORT_DIR = os.path.abspath(os.environ.get("EXPORT_DIR", "exports"))
+EXPORT_MAX_JOBS = int(os.environ.get("EXPORT_MAX_JOBS", 2))
+EXPORT_MAX_BYTES = int(os.environ.get("EXPORT_MAX_BYTES", 1024 ** 3))
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+STALE_JOB_SECONDS = 600  # A job whose status has not moved for this long has died
+
+DEFAULT_WIDTH = 640
+DEFAULT_HEIGHT = 360
+DEFAULT_FPS = 30
+FRAMES_PER_CHUNK = 32
+
+BACKGROUND = (255, 255, 255)
+BAR_COLOR = (108, 117, 125)
+PROGRESS_COLOR = (52, 152, 219)
+PROGRESS_HEIGHT = 4
+
+# Highlight colours by op, matching the canvas view on the sorting page
+OP_COLORS = {
+    "compare": (255, 165, 0),
+    "swap": (255, 0, 0),
+    "shift": (173, 216, 230),
+    "pivot": (255, 255, 0),
+    "settle": (144, 238, 144),
+    "lift": (255, 255, 0),
+    "place": (144, 238, 144),
+}
+
+logger = logging.getLogger(__name__)
+
+# Per worker process: the trace being exported, sent once by the pool initializer
+_worker_trace = None
+
+
+def frame_positions(length, steps_per_frame=1):
+    """Slider positions to render: every steps_per_frame-th step, then the finished array."""
+    positions = list(range(0, length, max(1, steps_per_frame)))
+    positions.append(length)
+    return positions
+
+
+def rasterize(values, highlight, progress, width, height, top):
+    """One RGB frame: a bar per sampled element, highlighted bars in their op colour."""
+    n = len(values)
+    columns = min(n, width)
+    sample = np.arange(columns) * n // columns
+    heights = np.asarray(values, dtype=np.float64)[sample] * (height - PROGRESS_HEIGHT - 1) / max(top, 1)
+    colors = np.tile(np.array(BAR_COLOR, dtype=np.uint8), (columns, 1))
+    for idx, color in highlight:
+        colors[idx * columns // n] = color
+
+    # Pixel column -> bar, with a one pixel gap between bars when they are wide enough
+    x = np.arange(width)
+    bar = x * columns // width
+    gap = (width // columns >= 4) & ((x + 1) * columns // width != bar)
+    y = np.arange(height - PROGRESS_HEIGHT)[:, None]
+    filled = (y >= (height - PROGRESS_HEIGHT) - heights[bar][None, :]) & ~gap[None, :]
+
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = BACKGROUND
+    frame[:height - PROGRESS_HEIGHT][filled] = colors[np.broadcast_to(bar, filled.shape)[filled]]
+    frame[height - PROGRESS_HEIGHT:, :int(progress * width)] = PROGRESS_COLOR
+    return frame
+
+
+def _init_worker(payload):
+    global _worker_trace
+    _worker_trace = deserialize_trace(payload)
+
+
+def _render_chunk(positions, width, height):
+    trace = _worker_trace
+    top = int(trace.initial.max()) if len(trace.initial) else 1
+    frames = np.empty((len(positions), height, width, 3), dtype=np.uint8)
+    # Slider position p shows the array after step p; the states come from one batched replay
+    for i, (position, state) in enumerate(zip(positions, trace.iter_states(np.add(positions, 1)))):
+        highlight = []
+        if position < len(trace):
+            op, a, b, c = trace.steps[position].tolist()
+            color = OP_COLORS.get(OPNAMES[op], OP_COLORS["compare"])
+            highlight = [(idx, color) for idx in (a, b, c) if idx >= 0]
+        frames[i] = rasterize(state, highlight, position / max(len(trace), 1), width, height, top)
+    return frames
+
+
+def export_trace(trace, path, fps=DEFAULT_FPS, steps_per_frame=1, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, workers=None, progress=None):
+    """Encode the trace's playback to `path` (.mp4 or .gif); returns the number of frames written.
+
+    `progress(done, total)` is called after every chunk.
+    """
+    import imageio.v2 as imageio  # Heavy, and only needed when exporting
+
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt or path}")
+    if fmt == "mp4":
+        writer = imageio.get_writer(path, fps=fps, macro_block_size=2)  # yuv420p only needs even sizes
+    else:
+        writer = imageio.get_writer(path, mode="I", duration=1000 / fps, loop=0)
+
+    positions = frame_positions(len(trace), steps_per_frame)
+    chunks = [positions[i:i + FRAMES_PER_CHUNK] for i in range(0, len(positions), FRAMES_PER_CHUNK)]
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    with writer, ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(serialize_trace(trace),)) as pool:
+        # Keep a couple of chunks per worker in flight; the encoder consumes them in order
+        pending = deque()
+        next_chunk = 0
+        while pending or next_chunk < len(chunks):
+            while next_chunk < len(chunks) and len(pending) < 2 * workers:
+                pending.append(pool.submit(_render_chunk, chunks[next_chunk], width, height))
+                next_chunk += 1
+            for frame in pending.popleft().result():
+                writer.append_data(frame)
+            done += FRAMES_PER_CHUNK
+            if progress:
+                progress(min(done, len(positions)), len(positions))
+    return len(positions)
+
+
+# Export jobs started from the web page run in their own process, so encoding
+# never blocks a web worker. Status lives next to the output as JSON, so any
+# worker process can report on any job.
+class ExportBusy(Exception):
+    """Raised by start_export_job() when EXPORT_MAX_JOBS exports are already running."""
+
+
+def job_status(job_id):
+    # The id comes back from the browser; anything but our own ids is not a job
+    if not isinstance(job_id, str) or not JOB_ID_PATTERN.fullmatch(job_id):
+        return None
+    try:
+        with open(os.path.join(EXPORT_DIR, f"{job_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def job_active(job_id):
+    """Whether the job is queued or running, and still writing progress."""
+    status = job_status(job_id)
+    if status is None or status["state"] not in ("queued", "running"):
+        return False
+    try:
+        return time.time() - os.path.getmtime(os.path.join(EXPORT_DIR, f"{job_id}.json")) < STALE_JOB_SECONDS
+    except OSError:
+        return False
+
+
+def _job_files():
+    """Files in EXPORT_DIR grouped by the job id they belong to."""
+    jobs = {}
+    for name in os.listdir(EXPORT_DIR):
+        job_id = name.split(".")[0]
+        if JOB_ID_PATTERN.fullmatch(job_id):
+            jobs.setdefault(job_id, []).append(os.path.join(EXPORT_DIR, name))
+    return jobs
+
+
+def prune_exports(max_bytes=EXPORT_MAX_BYTES):
+    """Delete the oldest finished, failed or abandoned exports until EXPORT_DIR fits in max_bytes."""
+    entries = []
+    for job_id, files in _job_files().items():
+        if job_active(job_id):
+            continue
+        try:
+            entries.append((max(os.path.getmtime(path) for path in files), sum(os.path.getsize(path) for path in files), files))
+        except OSError:
+            continue  # Removed by another worker meanwhile
+    total = sum(size for _, size, _ in entries)
+    for _, size, files in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        logger.info("export evicted %s bytes=%d", os.path.basename(files[0]).split(".")[0], size)
+
+
+def _write_status(job_id, **status):
+    path = os.path.join(EXPORT_DIR, f"{job_id}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(status, f)
+    os.replace(path + ".tmp", path)
+
+
+def _run_job(job_id, algorithm_name, arr, options, fmt, steps_per_frame):
+    filename = f"{job_id}.{fmt}"
+    try:
+        algorithm = get_algorithm(algorithm_name)
+        trace = Trace.from_steps(algorithm_name, arr, algorithm.steps(list(arr), **options), max_steps=TRACE_MAX_STEPS)
+        stride = steps_per_frame or max(1, len(trace) // 2000)  # Keep page exports to about a minute of video
+        export_trace(
+            trace, os.path.join(EXPORT_DIR, filename), steps_per_frame=stride,
+            # Running jobs share the CPUs instead of each starting a pool of cpu_count workers
+            workers=max(1, (os.cpu_count() or 1) // EXPORT_MAX_JOBS),
+            progress=lambda done, total: _write_status(job_id, state="running", done=done, total=total, filename=filename),
+        )
+        _write_status(job_id, state="done", filename=filename)
+    except Exception as exc:  # Reported on the page instead of dying silently
+        _write_status(job_id, state="failed", error=str(exc))
+
+
+def start_export_job(algorithm_name, arr, options=None, fmt="mp4", steps_per_frame=None):
+    """Start exporting in a separate process and return the job id to poll with job_status().
+
+    Raises ExportBusy when EXPORT_MAX_JOBS exports are already running.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    if sum(job_active(job_id) for job_id in _job_files()) >= EXPORT_MAX_JOBS:
+        raise ExportBusy(f"all {EXPORT_MAX_JOBS} export slots are in use")
+    prune_exports()
+    job_id = uuid.uuid4().hex
+    _write_status(job_id, state="queued")
+    process = multiprocessing.Process(target=_run_job, args=(job_id, algorithm_name, list(arr), options or {}, fmt, steps_per_frame))
+    process.start()
+    return job_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a sorting animation to MP4 or GIF.")
+    parser.add_argument("algorithm", choices=algorithm_names())
+    parser.add_argument("--output", required=True, help="output file, .mp4 or .gif")
+    parser.add_argument("--array", help="comma separated values to sort")
+    parser.add_argument("--size", type=int, default=100, help="generated array size (without --array)")
+    parser.add_argument("--distribution", default="random", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE", help="algorithm option such as pivot=median3")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--steps-per-frame", type=int, default=1)
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_HEIGHT)
+    parser.add_argument("--workers", type=int, help="rasterizer processes (default: CPU count)")
+    parser.add_argument("--max-steps", type=int, default=TRACE_MAX_STEPS)
+    args = parser.parse_args(argv)
+
+    algorithm = get_algorithm(args.algorithm)
+    arr = [int(v) for v in args.array.split(",")] if args.array else generate_array(args.size, args.distribution, args.seed)
+    options = algorithm.resolve_options(parse_options(args.option))
+    trace = Trace.from_steps(algorithm.name, arr, algorithm.steps(list(arr), **options), max_steps=args.max_steps)
+
+    def report(done, total):
+        print(f"\r{done}/{total} frames", end="", flush=True)
+
+    frames = export_trace(trace, args.output, args.fps, args.steps_per_frame, args.width, args.height, args.workers, report)
+    print(f"\nWrote {frames} frames ({len(trace):,} steps) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,250 +1,197 @@
-import dash
-from dash import dcc, html, Input, Output, State, ALL
-import dash_bootstrap_components as dbc
 import random
+from sorting_algorithms.registry import register_algorithm
+
+# Pivot choices, by the ?pivot= / dropdown value
+PIVOT_STRATEGIES = {
+    "last": "Last element",
+    "random": "Random element",
+    "median3": "Median of three",
+    "ninther": "Ninther (median of medians)",
+}
+
+FALLBACKS = {
+    "none": "No fallback",
+    "heap": "Introsort (heap sort fallback)",
+}
+
+# Index of the median of arr[i], arr[j], arr[k]
+def median_of_three(arr, i, j, k):
+    if arr[i] < arr[j]:
+        if arr[j] < arr[k]:
+            return j
+        return k if arr[i] < arr[k] else i
+    if arr[i] < arr[k]:
+        return i
+    return k if arr[j] < arr[k] else j
+
+def choose_pivot(arr, low, high, strategy, rng):
+    if strategy == "random":
+        return rng.randint(low, high)
+    mid = (low + high) // 2
+    if strategy == "median3" or (strategy == "ninther" and high - low < 8):
+        return median_of_three(arr, low, mid, high)
+    if strategy == "ninther":
+        # Tukey's ninther: the median of the medians of three spread-out triples
+        step = (high - low) // 8
+        return median_of_three(
+            arr,
+            median_of_three(arr, low, low + step, low + 2 * step),
+            median_of_three(arr, mid - step, mid, mid + step),
+            median_of_three(arr, high - 2 * step, high - step, high),
+        )
+    return high
+
+# Heap sort of arr[low..high], used once introsort runs out of depth. Its steps
+# carry the heap's first index as c, which tells them apart from partition steps.
+def heap_sort_steps(arr, low, high):
+    def sift_down(root, end):
+        while True:
+            largest = root
+            for child in (low + 2 * (root - low) + 1, low + 2 * (root - low) + 2):
+                if child <= end:
+                    yield ('compare', child, largest, low)
+                    if arr[child] > arr[largest]:
+                        largest = child
+            if largest == root:
+                return
+            yield ('swap', root, largest)
+            arr[root], arr[largest] = arr[largest], arr[root]
+            root = largest
+
+    for root in range((low + high - 1) // 2, low - 1, -1):
+        yield from sift_down(root, high)
+    for end in range(high, low, -1):
+        yield ('swap', low, end)  # Move the largest remaining value to the end
+        arr[low], arr[end] = arr[end], arr[low]
+        yield ('settle', end, -1, low)
+        yield from sift_down(low, end - 1)
+    yield ('settle', low, -1, low)
 
 # Quick Sort Algorithm with Step-by-Step Animation
-def quick_sort_steps(arr):
-    steps = []
-
-    def quick_sort_helper(arr, low, high):
-        if low < high:
-            # Partition the array and get the pivot index
-            pivot_idx = partition(arr, low, high, steps)
-            # Recursively sort the subarrays
-            quick_sort_helper(arr, low, pivot_idx - 1)
-            quick_sort_helper(arr, pivot_idx + 1, high)
-
-    def partition(arr, low, high, steps):
-        pivot = arr[high]  # Choose the last element as the pivot
-        steps.append(('pivot', high))  # Highlight the pivot
+def quick_sort_steps(arr, pivot="last", fallback="none", seed=0):
+    rng = random.Random(seed)  # Seeded, so a cached trace can always be rebuilt identically
+
+    def partition(arr, low, high):
+        # Move the chosen pivot to the end, then partition around it (Lomuto)
+        pivot_idx = choose_pivot(arr, low, high, pivot, rng)
+        if pivot_idx != high:
+            yield ('swap', pivot_idx, high)
+            arr[pivot_idx], arr[high] = arr[high], arr[pivot_idx]
+        pivot_value = arr[high]
+        yield ('pivot', high)  # Highlight the pivot
         i = low - 1  # Index of the smaller element
 
         for j in range(low, high):
-            steps.append(('compare', j, high))  # Compare with pivot
-            if arr[j] < pivot:
+            yield ('compare', j, high)  # Compare with pivot
+            if arr[j] < pivot_value:
                 i += 1
                 if i != j:
-                    steps.append(('swap', i, j))  # Swap elements
+                    yield ('swap', i, j)  # Swap elements
                     arr[i], arr[j] = arr[j], arr[i]
         if i + 1 != high:
-            steps.append(('swap', i + 1, high))  # Swap pivot into place
+            yield ('swap', i + 1, high)  # Swap pivot into place
             arr[i + 1], arr[high] = arr[high], arr[i + 1]
-        steps.append(('settle', i + 1))  # Pivot is now in its correct position
+        yield ('settle', i + 1)  # Pivot is now in its correct position
         return i + 1
 
-    quick_sort_helper(arr, 0, len(arr) - 1)
-    return steps
-
-# Layout for the Quick Sort Page
-def quick_sort_layout():
-    return html.Div(
-        children=[
-            # Header Section
-            dbc.Row(
-                dbc.Col(
-                    html.H1("Quick Sort Visualization", className="text-center my-4"),
-                    width=12
-                ),
-                className="w-100 m-0 p-0"
-            ),
-
-            # Buttons for Start, Restart, and Back
-            dbc.Row(
-                dbc.Col(
-                    html.Div(
-                        children=[
-                            dbc.Button(
-                                "Start Sorting",
-                                id="quick-sort-start-button",
-                                color="primary",
-                                className="btn-block mb-3",
-                                n_clicks=0
-                            ),
-                            dbc.Button(
-                                "Restart Sorting",
-                                id="quick-sort-restart-button",
-                                color="warning",
-                                className="btn-block mb-3",
-                                n_clicks=0
-                            ),
-                            dbc.Button(
-                                "Back",
-                                id="quick-sort-back-button",
-                                href="/",
-                                color="secondary",
-                                className="btn-block mb-3"
-                            ),
-                        ],
-                        className="text-center"
-                    ),
-                    width=12
-                ),
-                className="w-100 m-0 p-0"
-            ),
-
-            # Dynamic Array Display
-            dbc.Row(
-                dbc.Col(
-                    html.Div(id="quick-sort-array-container", style={"display": "flex", "justifyContent": "center", "alignItems": "flex-end", "height": "300px"}),
-                    width=12
-                ),
-                className="w-100 m-0 p-0"
-            ),
-
-            # Step Explanation
-            dbc.Row(
-                dbc.Col(
-                    html.Div(
-                        id="quick-sort-step-explanation",
-                        className="text-center mt-3 p-3",
-                        style={
-                            "fontSize": "24px",
-                            "fontWeight": "bold",
-                            "transition": "opacity 0.5s ease-in-out",
-                            "backgroundColor": "#f8f9fa",  # Light background color
-                            "border": "2px solid #dee2e6",  # Border
-                            "borderRadius": "10px",  # Rounded corners
-                            "maxWidth": "80%",  # Limit width
-                            "margin": "0 auto",  # Center horizontally
-                            "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.1)",  # Shadow
-                            "color": "#343a40"  # Dark text color
-                        }
-                    ),
-                    width=12
-                ),
-                className="w-100 m-0 p-0"
-            ),
-
-            # Interval for Animation (slowed down to 1500ms)
-            dcc.Interval(id="quick-sort-interval", interval=1500, n_intervals=0, disabled=True),
-
-            # Store component to hold the array data
-            dcc.Store(id="array-data-store")
-        ],
-        className="p-0 m-0 w-100"
-    )
-
-# Callbacks for Quick Sort
-def register_quick_sort_callbacks(app):
-    @app.callback(
-        [Output("quick-sort-array-container", "children", allow_duplicate=True),
-         Output("quick-sort-interval", "disabled", allow_duplicate=True),
-         Output("array-data-store", "data", allow_duplicate=True),
-         Output("quick-sort-step-explanation", "children", allow_duplicate=True),
-         Output("quick-sort-step-explanation", "style", allow_duplicate=True)],
-        [Input("quick-sort-interval", "n_intervals"),
-         Input("quick-sort-start-button", "n_clicks"),
-         Input("quick-sort-restart-button", "n_clicks"),
-         Input("quick-sort-back-button", "n_clicks")],
-        [State("quick-sort-array-container", "children"),
-         State("quick-sort-interval", "disabled"),
-         State("array-data-store", "data")],
-        prevent_initial_call=True
-    )
-    def update_quick_sort_array(n_intervals, start_clicks, restart_clicks, back_clicks, current_children, interval_disabled, array_data):
-        ctx = dash.callback_context
-
-        # Initialize array data if None
-        if array_data is None:
-            array_data = {
-                "array_values": [random.randint(1, 100) for _ in range(10)],
-                "steps": [],
-                "current_step": 0
-            }
-
-        arr = array_data["array_values"]
-        steps = array_data.get("steps", [])
-        current_step = array_data.get("current_step", 0)
-
-        # Identify which button was clicked
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
-
-        # Handle button clicks
-        if button_id == "quick-sort-start-button" and start_clicks > 0:
-            steps = quick_sort_steps(arr.copy())
-            array_data["steps"] = steps
-            array_data["current_step"] = 0
-            interval_disabled = False
-        elif button_id == "quick-sort-restart-button" and restart_clicks > 0:
-            array_data = {
-                "array_values": [random.randint(1, 100) for _ in range(10)],
-                "steps": [],
-                "current_step": 0
-            }
-            steps = quick_sort_steps(array_data["array_values"].copy())
-            array_data["steps"] = steps
-            interval_disabled = False
-        elif button_id == "quick-sort-back-button" and back_clicks > 0:
-            return [], True, array_data, "", {"fontSize": "20px", "opacity": 0}
-
-        # Step through sorting animation
-        step_explanation = "Click Start Button for sorting visualization"
-        explanation_style = {
-            "fontSize": "24px",
-            "fontWeight": "bold",
-            "transition": "opacity 0.5s ease-in-out",
-            "backgroundColor": "#f8f9fa",  # Light background color
-            "border": "2px solid #dee2e6",  # Border
-            "borderRadius": "10px",  # Rounded corners
-            "maxWidth": "80%",  # Limit width
-            "margin": "0 auto",  # Center horizontally
-            "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.1)",  # Shadow
-            "color": "#343a40"  # Dark text color
-        }
-
-        if start_clicks and start_clicks > 0:
-            if not interval_disabled and steps:
-                if current_step < len(steps):
-                    step = steps[current_step]
-                    action = step[0]
-
-                    if action == 'pivot':
-                        step_explanation = f"Selected pivot: {arr[step[1]]}"
-                    elif action == 'compare':
-                        step_explanation = f"Comparing {arr[step[1]]} with pivot {arr[step[2]]}"
-                    elif action == 'swap':
-                        arr[step[1]], arr[step[2]] = arr[step[2]], arr[step[1]]
-                        step_explanation = f"Swapping {arr[step[1]]} and {arr[step[2]]}"
-                    elif action == 'settle':
-                        step_explanation = f"Pivot {arr[step[1]]} is now in its correct position."
-
-                    array_data["current_step"] += 1
-                else:
-                    interval_disabled = True
-                    step_explanation = "Sorting completed!"
-                    explanation_style["opacity"] = 1
-
-        # Create boxes for the array elements
-        boxes = []
-        for idx, value in enumerate(arr):
-            box_style = {
-                "width": "100px",
-                "height": "100px",
-                "border": "3px solid #000",
-                "borderRadius": "50%",
-                "display": "flex",
-                "alignItems": "center",
-                "justifyContent": "center",
-                "fontSize": "20px",
-                "margin": "10px",
-                "transition": "transform 1s ease-in-out",
-            }
-
-            # Apply animations based on sorting step
-            if not interval_disabled and steps:
-                if current_step < len(steps):
-                    step = steps[current_step]
-                    if step[0] == 'pivot' and idx == step[1]:
-                        box_style["backgroundColor"] = "yellow"
-                    elif step[0] == 'compare' and (idx == step[1] or idx == step[2]):
-                        box_style["backgroundColor"] = "orange"
-                    elif step[0] == 'swap' and (idx == step[1] or idx == step[2]):
-                        box_style["backgroundColor"] = "red"
-                        box_style["transform"] = "translateY(-80px)"
-                    elif step[0] == 'settle' and idx == step[1]:
-                        box_style["backgroundColor"] = "lightgreen"
-
-            boxes.append(html.Div(str(value), style=box_style))
-
-        return boxes, interval_disabled, array_data, step_explanation, explanation_style
\ No newline at end of file
+    # Introsort: past 2 * log2(n) levels of partitioning, heap sort the rest
+    max_depth = 2 * len(arr).bit_length() if fallback == "heap" else None
+
+    # Explicit stack instead of recursion. The smaller side is sorted first, so
+    # the stack never holds more than log2(n) ranges.
+    stack = [(0, len(arr) - 1, 0)]
+    while stack:
+        low, high, depth = stack.pop()
+        if low >= high:
+            continue
+        if max_depth is not None and depth >= max_depth:
+            yield from heap_sort_steps(arr, low, high)
+            continue
+        # Partition the array and get the pivot index
+        pivot_idx = yield from partition(arr, low, high)
+        left, right = (low, pivot_idx - 1, depth + 1), (pivot_idx + 1, high, depth + 1)
+        if pivot_idx - low <= high - pivot_idx:
+            stack.extend((right, left))  # Left side is smaller: pop it first
+        else:
+            stack.extend((left, right))
+
+# Step explanation, read off the displayed values after the step is applied
+def describe_quick_sort_step(values, step):
+    action = step[0]
+    if action == 'pivot':
+        return f"Selected pivot: {values[step[1]]}"
+    elif action == 'compare' and len(step) > 3 and step[3] >= 0:
+        return f"Heap sort: comparing {values[step[1]]} and {values[step[2]]}"
+    elif action == 'compare':
+        return f"Comparing {values[step[1]]} with pivot {values[step[2]]}"
+    elif action == 'swap':
+        return f"Swapping {values[step[1]]} and {values[step[2]]}"
+    elif action == 'settle' and len(step) > 3 and step[3] >= 0:
+        return f"{values[step[1]]} is now in its correct position."
+    elif action == 'settle':
+        return f"Pivot {values[step[1]]} is now in its correct position."
+    return ""
+
+# CSS state classes (assets/styles.css) of box idx for the step being shown
+def highlight_quick_sort_step(idx, step):
+    if step[0] == 'pivot' and idx == step[1]:
+        return "pivot"
+    elif step[0] == 'compare' and (idx == step[1] or idx == step[2]):
+        return "compare"
+    elif step[0] == 'swap' and (idx == step[1] or idx == step[2]):
+        return "swap"
+    elif step[0] == 'settle' and idx == step[1]:
+        return "settled"
+    return ""
+
+# Recursion depth along a trace, for the live counters: (step positions, call depth from
+# that step on, the top-level call being depth 1). Steps do not carry their depth, but
+# ranges nest: a range's parent settled its pivot just outside it, at low - 1 or high + 1,
+# and whichever of the two settled last is the parent.
+def quick_sort_depths(trace):
+    import numpy as np
+    from sorting_algorithms.trace import OPCODES
+
+    op, a, b, c = (trace.steps[field] for field in ("op", "a", "b", "c"))
+    pivots = op == OPCODES["pivot"]
+    partition_settles = (op == OPCODES["settle"]) & (c < 0)
+    # Heap sort steps carry their range's first index as c; a new c starts a new range
+    heap = np.flatnonzero(c >= 0)
+    heap_starts = np.zeros(len(op), dtype=bool)
+    heap_starts[heap[np.diff(c[heap], prepend=-1) != 0]] = True
+    heap_settles = np.flatnonzero((op == OPCODES["settle"]) & (c >= 0))
+
+    events = np.flatnonzero(pivots | partition_settles | heap_starts)
+    following = np.minimum(events + 1, len(op) - 1)
+    settled = {}  # Pivot index -> depth of the partition that settled it
+    positions, depths = [], []
+    for s, is_pivot, is_settle, index, next_index in zip(events.tolist(), pivots[events].tolist(), partition_settles[events].tolist(),
+                                                         a[events].tolist(), a[following].tolist()):
+        if is_settle:
+            settled[index] = depths[-1] if depths else 1
+            continue
+        if is_pivot:
+            # The first comparison after the pivot is at low; a moved pivot was swapped in just before
+            low, high = next_index, index
+            if s > 0 and op[s - 1] == OPCODES["swap"] and b[s - 1] == high:
+                s -= 1
+        else:
+            # A heap sort range's first settle is at its high end
+            low, high = int(c[s]), -2
+            i = np.searchsorted(heap_settles, s)
+            if i < len(heap_settles) and c[heap_settles[i]] == low:
+                high = int(a[heap_settles[i]])
+        positions.append(s)
+        depths.append(1 + max(settled.get(low - 1, 0), settled.get(high + 1, 0)))
+    return positions, depths
+
+register_algorithm(
+    "quick-sort",
+    "Quick Sort",
+    steps=quick_sort_steps,
+    describe=describe_quick_sort_step,
+    highlight=highlight_quick_sort_step,
+    options={"pivot": PIVOT_STRATEGIES, "fallback": FALLBACKS},
+    recursion_depth=quick_sort_depths,
+    browser_playback=True,
+)
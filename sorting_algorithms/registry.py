@@ -0,0 +1,100 @@
+# registry.py
+import importlib
+from bisect import bisect_right
+from itertools import accumulate
+
+# Algorithm name (the ?method= value) -> module that registers it when imported.
+# Modules are imported lazily, the first time their algorithm is requested.
+ALGORITHM_MODULES = {
+    "quick-sort": "sorting_algorithms.quick_sort",
+    "selection-sort": "sorting_algorithms.selection_sort",
+    "insertion-sort": "sorting_algorithms.insertion_sort",
+}
+
+# Live counters shown while a trace plays: {label: {op: weight}}, summed over the steps so far
+DEFAULT_COUNTERS = {
+    "Comparisons": {"compare": 1},
+    "Swaps": {"swap": 1},
+    "Array writes": {"swap": 2},
+}
+
+_algorithms = {}
+
+
+class SortingAlgorithm:
+    """Everything the generic visualization page needs to know about one algorithm.
+
+    steps(arr) yields step tuples ('op', i, j[, k]) while sorting arr in place,
+    describe(values, step) returns the explanation for a step, and
+    highlight(idx, step) returns the CSS state classes of box idx for a step
+    ('' when plain); the classes are styled in assets/styles.css.
+    options maps keyword arguments of steps() to their choices ({value: label},
+    first one is the default); the page shows a dropdown for each.
+    layout, if given, replaces the generic page layout for this algorithm.
+    counters ({label: {op: weight}}, DEFAULT_COUNTERS if not given) are the
+    running totals shown during playback; recursion_depth(trace), if given,
+    returns (positions, depths): the depth from step positions[i] on.
+    browser_playback is True when assets/playback.js has describe and highlight
+    rules for this algorithm; without them, playback always ticks on the server.
+    """
+
+    def __init__(self, name, label, steps, describe, highlight, options=None, layout=None, counters=None, recursion_depth=None, browser_playback=False):
+        self.name = name
+        self.label = label
+        self.steps = steps
+        self.describe = describe
+        self.highlight = highlight
+        self.options = options or {}
+        self.layout = layout
+        self.counters = counters or DEFAULT_COUNTERS
+        self.recursion_depth = recursion_depth
+        self.browser_playback = browser_playback
+
+    def default_options(self):
+        return {name: next(iter(choices)) for name, choices in self.options.items()}
+
+    def resolve_options(self, selected):
+        """Known options from `selected`, falling back to the defaults for missing or invalid values."""
+        resolved = self.default_options()
+        for name, value in (selected or {}).items():
+            if name in self.options and value in self.options[name]:
+                resolved[name] = value
+        return resolved
+
+
+    def counts(self, trace, k):
+        """Counter totals ({label: value}) after the first k steps of `trace`.
+
+        Read from the trace's op counts, which start from a checkpoint, so a
+        tick costs the same wherever it is in the trace.
+        """
+        op_counts = trace.op_counts(k)
+        return {label: sum(op_counts[op] * weight for op, weight in weights.items()) for label, weights in self.counters.items()}
+
+    def depth_at(self, trace, k):
+        """(recursion depth at step k, deepest level reached so far), or None without recursion_depth."""
+        if self.recursion_depth is None:
+            return None
+        if "recursion_depth" not in trace.derived:
+            positions, depths = self.recursion_depth(trace)
+            trace.derived["recursion_depth"] = (positions, depths, list(accumulate(depths, max)))
+        positions, depths, deepest = trace.derived["recursion_depth"]
+        i = bisect_right(positions, k) - 1
+        return (depths[i], deepest[i]) if i >= 0 else (0, 0)
+
+
+def register_algorithm(name, label, steps, describe, highlight, **options):
+    algorithm = SortingAlgorithm(name, label, steps, describe, highlight, **options)
+    _algorithms[name] = algorithm
+    return algorithm
+
+
+def get_algorithm(name):
+    """Return the registered algorithm, importing its module on first use (None if unknown)."""
+    if name not in _algorithms and name in ALGORITHM_MODULES:
+        importlib.import_module(ALGORITHM_MODULES[name])
+    return _algorithms.get(name)
+
+
+def algorithm_names():
+    return list(ALGORITHM_MODULES)
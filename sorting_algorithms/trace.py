@@ -0,0 +1,253 @@
+# trace.py
+import base64
+import zlib
+from itertools import chain, islice
+import numpy as np
+
+# Opcodes shared by every step generator. A step is a tuple of the op name
+# followed by up to three array indices, e.g. ('compare', j, high) or ('swap', i, j).
+OPCODES = {
+    "compare": 1,  # highlight a comparison between indices a and b (c: current minimum)
+    "swap": 2,     # exchange the values at a and b
+    "shift": 3,    # value moved one slot to the right, from a to b
+    "pivot": 4,    # a is the partition pivot
+    "settle": 5,   # a is in its final position
+    "lift": 6,     # insertion sort picks up the key at b to compare against a
+    "place": 7,    # insertion sort drops the key at a (picked up from b)
+}
+OPNAMES = {code: name for name, code in OPCODES.items()}
+
+# One row per step: opcode plus three indices, -1 where an index is unused
+STEP_DTYPE = np.dtype([("op", np.uint8), ("a", np.int32), ("b", np.int32), ("c", np.int32)])
+
+TRACE_FORMAT_VERSION = 1
+
+# Full array snapshots are kept every K steps, K = max(this, len(array)), so
+# seeking replays at most K steps while keyframes stay about as big as the trace.
+MIN_KEYFRAME_INTERVAL = 64
+
+
+# Unused trailing indices by step length: ('settle', 3) -> (5, 3, -1, -1)
+_PADDING = {1: (-1, -1, -1), 2: (-1, -1), 3: (-1,), 4: ()}
+
+
+def pack_steps(steps):
+    """Pack an iterable of step tuples into a STEP_DTYPE structured array."""
+    # One flat int32 stream is much cheaper to build than a structured row per step
+    flat = np.fromiter(
+        chain.from_iterable((OPCODES[step[0]],) + tuple(step[1:]) + _PADDING[len(step)] for step in steps),
+        dtype=np.int32,
+    ).reshape(-1, 4)
+    packed = np.empty(len(flat), dtype=STEP_DTYPE)
+    for column, field in enumerate(STEP_DTYPE.names):
+        packed[field] = flat[:, column]
+    return packed
+
+
+class Trace:
+    """Opcode/index trace of a sorting run plus the array it started from.
+
+    'swap' is the only step that changes the array, and a swap is its own
+    inverse, so a trace can be replayed in either direction. A truncated
+    trace stops at a step limit, before the array is sorted.
+    """
+
+    def __init__(self, algorithm, initial, steps, keyframe_interval=None, truncated=False, keyframes=None, op_checkpoints=None):
+        self.algorithm = algorithm
+        self.initial = np.asarray(initial, dtype=np.int64)
+        self.steps = steps
+        self.keyframe_interval = keyframe_interval or max(MIN_KEYFRAME_INTERVAL, len(self.initial))
+        self.truncated = truncated
+        self._keyframes = keyframes  # Precomputed, e.g. memory-mapped from a trace store
+        self._op_checkpoints = op_checkpoints  # Precomputed too, alongside the keyframes
+        self.derived = {}  # Results other modules compute once from the steps, e.g. recursion depth
+
+    @classmethod
+    def from_steps(cls, algorithm, arr, steps, max_steps=None):
+        # `steps` may be a generator that mutates `arr`, so snapshot it first
+        initial = np.array(arr, dtype=np.int64)
+        if max_steps is None:
+            return cls(algorithm, initial, pack_steps(steps))
+        # Take one step past the limit to tell "exactly max_steps" from "cut off"
+        packed = pack_steps(islice(steps, max_steps + 1))
+        return cls(algorithm, initial, packed[:max_steps], truncated=len(packed) > max_steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def step(self, k):
+        """Return step k as a tuple in the generators' own shape."""
+        op, a, b, c = self.steps[k].tolist()
+        return (OPNAMES[op], a, b, c)
+
+    @property
+    def keyframes(self):
+        """keyframes[f] is the array after the first f * keyframe_interval steps (built on first use)."""
+        if self._keyframes is None:
+            interval = self.keyframe_interval
+            stops = np.arange(1, len(self.steps) // interval + 1) * interval
+            keyframes = np.empty((len(stops) + 1, len(self.initial)), dtype=self.initial.dtype)
+            keyframes[0] = self.initial
+            for f, state in enumerate(replay(self.initial, self.steps[:stops[-1] if len(stops) else 0], stops), 1):
+                keyframes[f] = state
+            self._keyframes = keyframes
+        return self._keyframes
+
+    def state_at(self, k):
+        """Array contents after the first k steps, replaying at most keyframe_interval steps."""
+        return next(self.iter_states([k])).copy()
+
+    def iter_states(self, positions):
+        """Yield the array after the first k steps for each k in the nondecreasing `positions`.
+
+        One array is updated in place and yielded each time; copy it to keep it.
+        """
+        positions = np.clip(np.asarray(positions, dtype=np.int64), 0, len(self.steps))
+        if not len(positions):
+            return iter(())
+        first = positions[0] // self.keyframe_interval * self.keyframe_interval
+        steps = self.steps[first:positions[-1]]
+        return replay(self.keyframes[first // self.keyframe_interval], steps, positions - first)
+
+    def states_at(self, positions):
+        """Array contents after each of `positions` steps, one row per position (any order)."""
+        positions = np.asarray(positions, dtype=np.int64)
+        order = np.argsort(positions, kind="stable")
+        states = np.empty((len(positions), len(self.initial)), dtype=self.initial.dtype)
+        for row, state in zip(order, self.iter_states(positions[order])):
+            states[row] = state
+        return states
+
+    @property
+    def op_checkpoints(self):
+        """op_checkpoints[f, code] counts the steps with opcode `code` among the first f * keyframe_interval steps."""
+        if self._op_checkpoints is None:
+            interval = self.keyframe_interval
+            blocks = self.steps["op"][:len(self.steps) // interval * interval].reshape(-1, interval)
+            checkpoints = np.zeros((len(blocks) + 1, len(OPCODES) + 1), dtype=np.int64)
+            for code in OPNAMES:
+                np.cumsum(np.count_nonzero(blocks == code, axis=1), out=checkpoints[1:, code])
+            self._op_checkpoints = checkpoints
+        return self._op_checkpoints
+
+    def op_counts(self, k):
+        """Number of steps of each op among the first k steps, e.g. {'compare': 12, 'swap': 4, ...}.
+
+        Counts start from the checkpoint before k, so at most keyframe_interval steps are scanned.
+        """
+        k = max(0, min(k, len(self.steps)))
+        f = k // self.keyframe_interval
+        counts = self.op_checkpoints[f] + np.bincount(self.steps["op"][f * self.keyframe_interval:k], minlength=len(OPCODES) + 1)
+        return {name: int(counts[code]) for name, code in OPCODES.items()}
+
+    @property
+    def nbytes(self):
+        # Memory-mapped arrays live in the shared page cache, not in this process
+        arrays = (self.initial, self.steps, self._keyframes, self._op_checkpoints)
+        return sum(arr.nbytes for arr in arrays if arr is not None and not isinstance(arr, np.memmap))
+
+
+def swap_moves(a, b, segments):
+    """Compose the swaps (a[i], b[i]), applied in order, into one permutation per segment.
+
+    `segments` (nondecreasing) assigns each swap to a run. Returns (segment,
+    src, dst) sorted by segment: over its run, the value at src moves to dst.
+    Positions the run does not touch are left out.
+    """
+    m = len(a)
+    if not m:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Event 2i is swap i at a[i], event 2i+1 the same swap at b[i]; a value that
+    # enters event e leaves through its partner e ^ 1 to the other index
+    position = np.empty(2 * m, dtype=np.int64)
+    position[0::2] = a
+    position[1::2] = b
+    key = np.repeat(np.asarray(segments, dtype=np.int64), 2) * (int(position.max()) + 1) + position
+    order = np.argsort(key, kind="stable")  # Events per (segment, index), in time order
+    same = key[order[1:]] == key[order[:-1]]
+    following = np.full(2 * m, -1)
+    following[order[:-1][same]] = order[1:][same]
+
+    # hop[e]: the next event the value leaving e takes part in (e itself when none).
+    # Pointer doubling follows every value to its last event in O(log m) passes.
+    events = np.arange(2 * m)
+    hop = following[events ^ 1]
+    hop = np.where(hop >= 0, hop, events)
+    while True:
+        jumped = hop[hop]
+        if np.array_equal(jumped, hop):
+            break
+        hop = jumped
+
+    first = order[np.concatenate(([True], ~same))]  # First event at each touched index of a segment
+    return np.repeat(np.asarray(segments, dtype=np.int64), 2)[first], position[first], position[hop[first] ^ 1]
+
+
+def replay(state, steps, stops):
+    """Yield the array after steps[:stop] for each stop in the nondecreasing `stops`, starting from `state`.
+
+    The swaps between consecutive stops are composed into permutations in a
+    few NumPy passes, so nothing loops per step. One array is updated in place
+    and yielded each time.
+    """
+    state = np.array(state)
+    stops = np.asarray(stops, dtype=np.int64)
+    at = np.flatnonzero(steps["op"][:stops[-1] if len(stops) else 0] == OPCODES["swap"])
+    swaps = steps[at]
+    segment, src, dst = swap_moves(swaps["a"], swaps["b"], np.searchsorted(stops, at, side="right"))
+    bounds = np.searchsorted(segment, np.arange(len(stops) + 1))
+    for run in range(len(stops)):
+        moved = slice(bounds[run], bounds[run + 1])
+        state[dst[moved]] = state[src[moved]]
+        yield state
+
+
+def _delta(column):
+    return np.diff(column.astype(np.int64), prepend=0).astype("<i4")
+
+
+def serialize_trace(trace, compress=True):
+    """Encode a trace as a small JSON-safe dict.
+
+    Index columns are delta-encoded (consecutive steps usually touch nearby
+    indices) and laid out column by column so zlib can squeeze the runs.
+    """
+    steps = trace.steps
+    blob = b"".join([
+        steps["op"].astype(np.uint8).tobytes(),
+        _delta(steps["a"]).tobytes(),
+        _delta(steps["b"]).tobytes(),
+        _delta(steps["c"]).tobytes(),
+    ])
+    if compress:
+        blob = zlib.compress(blob, 6)
+    return {
+        "version": TRACE_FORMAT_VERSION,
+        "algorithm": trace.algorithm,
+        "initial": trace.initial.tolist(),
+        "length": len(steps),
+        "compressed": compress,
+        "truncated": trace.truncated,
+        "steps": base64.b64encode(blob).decode("ascii"),
+    }
+
+
+def deserialize_trace(payload):
+    """Inverse of serialize_trace()."""
+    if payload.get("version") != TRACE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported trace format version: {payload.get('version')}")
+
+    blob = base64.b64decode(payload["steps"])
+    if payload.get("compressed", True):
+        blob = zlib.decompress(blob)
+
+    length = payload["length"]
+    steps = np.empty(length, dtype=STEP_DTYPE)
+    steps["op"] = np.frombuffer(blob, dtype=np.uint8, count=length)
+    offset = length
+    for field in ("a", "b", "c"):
+        deltas = np.frombuffer(blob, dtype="<i4", count=length, offset=offset)
+        steps[field] = np.cumsum(deltas, dtype=np.int64)
+        offset += 4 * length
+    return Trace(payload["algorithm"], payload["initial"], steps, truncated=payload.get("truncated", False))
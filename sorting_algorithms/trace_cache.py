@@ -0,0 +1,110 @@
+# trace_cache.py
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from sorting_algorithms.trace import Trace
+from sorting_algorithms.trace_store import trace_store
+
+# Bounds for the process-wide cache; override per deployment via env vars
+TRACE_CACHE_MAX_ENTRIES = int(os.environ.get("TRACE_CACHE_MAX_ENTRIES", 256))
+TRACE_CACHE_MAX_BYTES = int(os.environ.get("TRACE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Longest trace built for one run; quadratic sorts on large inputs stop here
+TRACE_MAX_STEPS = int(os.environ.get("TRACE_MAX_STEPS", 5_000_000))
+
+logger = logging.getLogger(__name__)
+
+
+def trace_key(algorithm, arr, options=None):
+    """Cache key for running `algorithm` with `options` on `arr`, e.g. 'quick-sort:3f9a...'."""
+    digest = hashlib.blake2b(np.asarray(arr, dtype=np.int64).tobytes(), digest_size=12)
+    if options:
+        digest.update(repr(sorted(options.items())).encode())
+    return f"{algorithm}:{digest.hexdigest()}"
+
+
+class TraceCache:
+    """Thread-safe LRU of built traces, bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries=TRACE_CACHE_MAX_ENTRIES, max_bytes=TRACE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            trace = self._entries.get(key)
+            if trace is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return trace
+
+    def put(self, key, trace):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).nbytes
+            self._entries[key] = trace
+            self._bytes += trace.nbytes
+            # Evict least recently used entries, but always keep the newest one
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def find(self, key):
+        """The trace for `key` if this process has it or the trace store holds it finished, else None."""
+        trace = self.get(key)
+        if trace is None and trace_store.directory:
+            trace = trace_store.load(key)
+            if trace is not None:
+                self.put(key, trace)
+        return trace
+
+    def get_or_build(self, algorithm, arr, step_function, options=None):
+        """Return (key, trace), building the trace with `step_function(arr, **options)` on a miss.
+
+        The key is always computed here from the inputs, never taken from a
+        client: the cache is shared by every session, so a trace must only
+        ever be stored under the key of the array it was built from.
+        Large arrays go through the trace store instead: the cached trace is
+        memory-mapped from disk, and another worker's copy is reused as is.
+        """
+        key = trace_key(algorithm, arr, options)
+        trace = self.find(key) if trace_store.wants(arr) else self.get(key)
+        if trace is None:
+            started = time.perf_counter()
+            steps = step_function(list(arr), **(options or {}))
+            if trace_store.wants(arr):
+                trace = trace_store.save(key, algorithm, arr, steps, max_steps=TRACE_MAX_STEPS)
+            else:
+                trace = Trace.from_steps(algorithm, arr, steps, max_steps=TRACE_MAX_STEPS)
+                trace.keyframes  # Build seek keyframes up front so the cache accounts for them
+            self.put(key, trace)
+            logger.info("trace built key=%s steps=%d truncated=%s bytes=%d ms=%.1f",
+                        key, len(trace), trace.truncated, trace.nbytes, (time.perf_counter() - started) * 1000)
+        return key, trace
+
+
+# Shared by every worker thread in this process
+trace_cache = TraceCache()
@@ -0,0 +1,262 @@
+# trace_store.py
+# Disk-backed traces for large arrays. A trace is written once, streamed from
+# its step generator in chunks, and read back through numpy.memmap: playback
+# touches one keyframe plus at most keyframe_interval steps per frame, so a
+# session costs the same RAM whatever the trace length, and every worker that
+# opens the same file shares it through the page cache.
+#
+#   <key>.steps       raw STEP_DTYPE rows
+#   <key>.keyframes   raw int64 array states, one every keyframe_interval steps
+#                     (row 0 is the initial array)
+#   <key>.checkpoints raw int64 op counts at the same steps (Trace.op_checkpoints),
+#                     so neither a finished nor a growing trace recounts its steps
+#   <key>.json        algorithm, length, array size, interval, truncated;
+#                     written last, so its presence marks a complete trace
+#   <key>.partial.json  while a trace is being written: the same fields for the
+#                     steps flushed so far, and where the unfinished files are,
+#                     so playback can start before the build ends
+#   array-<digest>.array  a large pasted or uploaded input array (raw int64), so
+#                     the session store only carries its key
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from itertools import islice
+import numpy as np
+from sorting_algorithms.trace import MIN_KEYFRAME_INTERVAL, OPCODES, STEP_DTYPE, Trace, pack_steps, replay
+
+# Directory shared by the workers ("" disables the store), the array size from
+# which traces go to disk rather than memory, and a soft bound on disk use
+TRACE_STORE_DIR = os.environ.get("TRACE_STORE_DIR", os.path.join(tempfile.gettempdir(), "sorting-traces"))
+TRACE_STORE_MIN_ELEMENTS = int(os.environ.get("TRACE_STORE_MIN_ELEMENTS", 1000))
+TRACE_STORE_MAX_BYTES = int(os.environ.get("TRACE_STORE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Steps packed per write while streaming a generator to disk
+WRITE_CHUNK_STEPS = 1 << 18
+
+# Unfinished traces untouched for this long were abandoned (cancelled or crashed builds)
+STALE_PARTIAL_SECONDS = 3600
+
+# Array keys come back from the browser, so only this exact form is opened
+ARRAY_KEY_PATTERN = re.compile(r"array-[0-9a-f]{24}")
+
+logger = logging.getLogger(__name__)
+
+
+def _write_json(path, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_trace(prefix, algorithm, arr, steps, max_steps=None, progress=None):
+    """Stream the step generator `steps` (which may mutate `arr`) to `prefix`.* files.
+
+    Keyframes and op checkpoints are taken on the way, so only one chunk of steps and one array
+    state are in memory at a time. After every chunk the steps so far are
+    published for open_partial() and `progress(steps_written)` is called.
+    Returns the trace's metadata.
+    """
+    initial = np.array(arr, dtype=np.int64)
+    interval = max(MIN_KEYFRAME_INTERVAL, len(initial))
+    if max_steps is not None:
+        steps = islice(steps, max_steps + 1)  # One past the limit tells "exactly max_steps" from "cut off"
+    state = initial
+    counts = np.zeros(len(OPCODES) + 1, dtype=np.int64)
+    length = 0
+    truncated = False
+
+    # Written under temporary names and renamed into place: readers never see a partial trace,
+    # and two workers writing the same trace just replace one identical file with another
+    temporary = f"{prefix}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(temporary + ".steps", "wb") as steps_file, open(temporary + ".keyframes", "wb") as keyframes_file, \
+            open(temporary + ".checkpoints", "wb") as checkpoints_file:
+        keyframes_file.write(initial.tobytes())
+        checkpoints_file.write(counts.tobytes())
+        while True:
+            chunk = pack_steps(islice(steps, WRITE_CHUNK_STEPS))
+            if max_steps is not None and length + len(chunk) > max_steps:
+                chunk, truncated = chunk[:max_steps - length], True
+            if not len(chunk):
+                break
+            steps_file.write(chunk.tobytes())
+            # Keyframe f is the state after f * interval steps; the last stop carries the state
+            # over to the next chunk
+            boundaries = np.arange((length // interval + 1) * interval, length + len(chunk) + 1, interval) - length
+            states = replay(state, chunk, np.append(boundaries, len(chunk)))
+            for _, state in zip(boundaries, states):
+                keyframes_file.write(state.tobytes())
+            state = next(states).copy()
+            # Op counts at the same boundaries; the last row carries the totals over
+            stops = np.append(boundaries, len(chunk))
+            rows = np.empty((len(stops), len(counts)), dtype=np.int64)
+            for code in range(len(counts)):
+                rows[:, code] = np.concatenate(([0], np.cumsum(chunk["op"] == code)))[stops]
+            rows += counts
+            checkpoints_file.write(rows[:-1].tobytes())
+            counts = rows[-1]
+            length += len(chunk)
+            steps_file.flush()
+            keyframes_file.flush()
+            checkpoints_file.flush()
+            _write_json(prefix + ".partial.json", {
+                "algorithm": algorithm, "length": length, "size": len(initial), "keyframe_interval": interval,
+                "truncated": False, "files": temporary,
+            })
+            if progress:
+                progress(length)
+            if truncated:
+                break
+
+    meta = {"algorithm": algorithm, "length": length, "size": len(initial), "keyframe_interval": interval, "truncated": truncated}
+    _write_json(temporary + ".json", meta)
+    for suffix in (".steps", ".keyframes", ".checkpoints", ".json"):
+        os.replace(temporary + suffix, prefix + suffix)
+    try:
+        os.remove(prefix + ".partial.json")
+    except OSError:
+        pass
+    return meta
+
+
+def _map_trace(files, meta):
+    # numpy.memmap cannot map an empty file
+    if meta["length"]:
+        steps = np.memmap(files + ".steps", dtype=STEP_DTYPE, mode="r", shape=(meta["length"],))
+    else:
+        steps = np.empty(0, dtype=STEP_DTYPE)
+    keyframe_count = meta["length"] // meta["keyframe_interval"] + 1
+    if meta["size"]:
+        keyframes = np.memmap(files + ".keyframes", dtype=np.int64, mode="r", shape=(keyframe_count, meta["size"]))
+    else:
+        keyframes = np.empty((keyframe_count, 0), dtype=np.int64)
+    # Traces written before checkpoints were stored count their steps on first use instead
+    checkpoints = None
+    if os.path.exists(files + ".checkpoints"):
+        checkpoints = np.memmap(files + ".checkpoints", dtype=np.int64, mode="r", shape=(keyframe_count, len(OPCODES) + 1))
+    return Trace(meta["algorithm"], keyframes[0], steps, meta["keyframe_interval"], meta["truncated"], keyframes=keyframes,
+                 op_checkpoints=checkpoints)
+
+
+def open_trace(prefix):
+    """Memory-map a trace written by write_trace(), or return None if there is none."""
+    meta = _read_json(prefix + ".json")
+    return None if meta is None else _map_trace(prefix, meta)
+
+
+def open_partial(prefix):
+    """Memory-map the steps written so far of a trace still being written, or return None."""
+    meta = _read_json(prefix + ".partial.json")
+    if meta is None:
+        return None
+    try:
+        return _map_trace(meta["files"], meta)
+    except (OSError, ValueError):
+        return None  # Finished (and renamed) or abandoned meanwhile
+
+
+class TraceStore:
+    """Directory of memory-mapped traces, keyed like the trace cache."""
+
+    def __init__(self, directory=TRACE_STORE_DIR, min_elements=TRACE_STORE_MIN_ELEMENTS, max_bytes=TRACE_STORE_MAX_BYTES):
+        self.directory = directory
+        self.min_elements = min_elements
+        self.max_bytes = max_bytes
+
+    def wants(self, arr):
+        return bool(self.directory) and len(arr) >= self.min_elements
+
+    def _prefix(self, key):
+        return os.path.join(self.directory, key.replace(":", "-"))
+
+    def load(self, key):
+        trace = open_trace(self._prefix(key))
+        if trace is not None:
+            os.utime(self._prefix(key) + ".json")  # Recently used, for prune()
+        return trace
+
+    def load_partial(self, key):
+        return open_partial(self._prefix(key))
+
+    def save(self, key, algorithm, arr, steps, max_steps=None, progress=None):
+        os.makedirs(self.directory, exist_ok=True)
+        write_trace(self._prefix(key), algorithm, arr, steps, max_steps, progress)
+        self.prune()
+        return self.load(key)
+
+    def save_array(self, values):
+        """Write the int64 array `values` once and return the key that load_array() takes."""
+        values = np.ascontiguousarray(values, dtype=np.int64)
+        key = "array-" + hashlib.blake2b(values.tobytes(), digest_size=12).hexdigest()
+        path = os.path.join(self.directory, key + ".array")
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+            values.tofile(temporary)
+            os.replace(temporary, path)
+            self.prune()
+        return key
+
+    def load_array(self, key):
+        """The array saved under `key`, or None if there is none (pruned, or not a valid key)."""
+        if not ARRAY_KEY_PATTERN.fullmatch(key or ""):
+            return None
+        path = os.path.join(self.directory, key + ".array")
+        try:
+            values = np.fromfile(path, dtype=np.int64)
+            os.utime(path)  # Recently used, for prune()
+        except OSError:
+            return None
+        return values
+
+    def prune(self):
+        """Delete the least recently used traces and arrays until the store fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if ".tmp" in name or name.endswith(".partial.json"):
+                try:
+                    if time.time() - os.path.getmtime(path) > STALE_PARTIAL_SECONDS:
+                        os.remove(path)
+                except OSError:
+                    pass
+            elif name.endswith(".json"):
+                prefix = os.path.join(self.directory, name[:-5])
+                files = [prefix + suffix for suffix in (".json", ".steps", ".keyframes", ".checkpoints")]
+                try:
+                    size = sum(os.path.getsize(path) for path in files[1:] if os.path.exists(path))
+                    entries.append((os.path.getmtime(prefix + ".json"), size, files))
+                except OSError:
+                    continue  # Removed by another worker meanwhile
+            elif name.endswith(".array"):
+                try:
+                    entries.append((os.path.getmtime(path), os.path.getsize(path), [path]))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in entries)
+        # Open maps stay valid after unlink, so this is safe while others play a trace
+        for _, size, files in sorted(entries)[:-1]:
+            if total <= self.max_bytes:
+                break
+            for path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            logger.info("trace store evicted %s bytes=%d", os.path.basename(files[0]), size)
+
+
+trace_store = TraceStore()
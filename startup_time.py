@@ -0,0 +1,109 @@
+# startup_time.py
+# Cold-start cost of a worker, checked against budgets:
+#   python startup_time.py          (exits 1 if a budget is exceeded)
+# Every run is a fresh interpreter that imports app under -X importtime and
+# then serves what a new worker serves first: the page shell, the layout and
+# dependencies, and the callback rendering the home page.
+import json
+import statistics
+import subprocess
+import sys
+
+# Budgets in seconds (medians over RUNS), from interpreter start
+IMPORT_BUDGET_SECONDS = 1.0
+FIRST_RESPONSE_BUDGET_SECONDS = 1.5
+RUNS = 5
+
+# Importing app may not load any of these (beyond what Dash itself imports);
+# they load on first use
+DEFERRED_MODULES = (
+    "numpy",
+    "imageio",
+    "PIL",
+    "sorting_algorithms.trace",
+    "sorting_algorithms.trace_cache",
+    "sorting_algorithms.quick_sort",
+    "sorting_algorithms.selection_sort",
+    "sorting_algorithms.insertion_sort",
+)
+
+# Our own top-level packages, reported separately from the framework's cost
+OWN_MODULES = ("app", "api", "pages", "sorting_algorithms", "metrics", "profiling")
+
+WORKER = """
+import gc, json, sys, time
+started = time.perf_counter()
+import dash
+framework = set(sys.modules)
+import app
+imported = time.perf_counter()
+deferred_loaded = [name for name in %r if name in sys.modules and name not in framework]
+client = app.server.test_client()
+client.get("/")
+client.get("/_dash-layout")
+client.get("/_dash-dependencies")
+client.post("/_dash-update-component", json={
+    "output": "page-content.children",
+    "outputs": {"id": "page-content", "property": "children"},
+    "inputs": [{"id": "url", "property": "pathname", "value": "/"},
+               {"id": "stored-method", "property": "data", "value": ""}],
+    "state": [{"id": "url", "property": "search", "value": ""}],
+    "changedPropIds": ["url.pathname"],
+})
+responded = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "first_response": responded - started,
+    "dash_apps": sum(isinstance(obj, dash.Dash) for obj in gc.get_objects()),
+    "deferred_loaded": deferred_loaded,
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def parse_importtime(stderr):
+    """(module, self seconds, cumulative seconds, depth) for each line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, (len(name) - len(name.lstrip())) // 2))
+    return rows
+
+
+def run_once():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", WORKER], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main():
+    runs = [run_once() for _ in range(RUNS)]
+    timings = [timing for timing, _ in runs]
+    import_seconds = statistics.median(t["import"] for t in timings)
+    first_response = statistics.median(t["first_response"] for t in timings)
+
+    # Heaviest imports of the last run: our modules, then the top-level third-party ones
+    rows = runs[-1][1]
+    own = sorted((r for r in rows if r[0].split(".")[0] in OWN_MODULES), key=lambda r: -r[1])[:8]
+    third_party = sorted((r for r in rows if r[3] <= 1 and r[0].split(".")[0] not in OWN_MODULES), key=lambda r: -r[2])[:8]
+    print(f"{'module':<40}{'self ms':>10}{'total ms':>10}")
+    for name, self_s, cumulative_s, _ in own + third_party:
+        print(f"{name:<40}{self_s * 1000:>10.1f}{cumulative_s * 1000:>10.1f}")
+    print(f"\nimport app: {import_seconds * 1000:.0f} ms, first response: {first_response * 1000:.0f} ms (median of {RUNS})")
+
+    failures = []
+    if import_seconds > IMPORT_BUDGET_SECONDS:
+        failures.append(f"import {import_seconds:.2f}s > {IMPORT_BUDGET_SECONDS}s")
+    if first_response > FIRST_RESPONSE_BUDGET_SECONDS:
+        failures.append(f"first response {first_response:.2f}s > {FIRST_RESPONSE_BUDGET_SECONDS}s")
+    if timings[-1]["dash_apps"] != 1:
+        failures.append(f"{timings[-1]['dash_apps']} Dash apps created at import, expected 1")
+    if timings[-1]["deferred_loaded"]:
+        failures.append(f"imported at startup: {', '.join(timings[-1]['deferred_loaded'])}")
+    for failure in failures:
+        print("FAIL", failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())